@@ -7,15 +7,25 @@ Uses procedural generation with AI-guided styling from Gemini.
 import numpy as np
 import google.generativeai as genai
 from django.conf import settings
-from moviepy.editor import VideoClip, AudioFileClip, CompositeVideoClip, TextClip, ColorClip
+from moviepy.editor import VideoClip, AudioFileClip, CompositeVideoClip, ColorClip
 from moviepy.video.fx import resize
 from ai_error_handler import handle_error, get_error_message
+import animation_kernels
+from audio_features import StreamingFeatureExtractor, ffmpeg_available, stream_pcm
+from particle_system import ParticleSystem
+import text_overlay
 import colorsys
+import hashlib
+import json
+from collections import OrderedDict, deque
 from pathlib import Path
-import cv2
 import subprocess
-import tempfile
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 
 try:
     import librosa
@@ -28,9 +38,54 @@ except ImportError:
 class AnimationGenerator:
     """Generate vibrant audio-reactive animations."""
     
-    def __init__(self):
-        """Initialize the animation generator."""
-        self.gemini_available = bool(settings.GEMINI_API_KEY)
+    WAVE_LEVELS = 1024  # Quantization of the calm wave gradient (power of two)
+    
+    # Audio analysis (bump ANALYSIS_VERSION whenever extracted features change)
+    ANALYSIS_VERSION = 3
+    ANALYSIS_SAMPLE_RATE = 22050
+    ENVELOPE_FEATURES = ('onset', 'rms', 'flux', 'bass', 'mid', 'treble')
+    ANALYSIS_ARRAYS = ('beat_times', 'feature_times') + ENVELOPE_FEATURES
+    
+    # Visual style cache (bump STYLE_CACHE_VERSION whenever the prompt changes).
+    # Bucket edges follow the mood thresholds, so each bucket maps to one mood.
+    STYLE_CACHE_VERSION = 1
+    TEMPO_BUCKET_EDGES = (80, 100, 120, 140, 160)
+    ENERGY_BUCKET_EDGES = (0.1, 0.3, 0.5, 0.6, 0.8)
+    
+    # Preview renders: a short low-resolution clip for approving style and colors
+    PREVIEW_SECONDS = 4
+    PREVIEW_SCALE = 0.25
+    PREVIEW_FPS = 10
+    
+    # Title/hashtag overlays (sizes in output pixels); beats pick a larger scale level
+    TEXT_SCALES = (1.0, 1.02, 1.04, 1.06, 1.08)
+    TEXT_FADE_SECONDS = 0.5
+    
+    # Particle field per renderer (sizes and speeds in output pixels)
+    PARTICLE_STYLES = {
+        'energetic': {'count': 6000, 'velocity': (0.0, -160.0), 'sway': 25.0,
+                      'radius_range': (1.5, 4.0), 'alpha_range': (0.15, 0.45)},
+        'calm': {'count': 5000, 'velocity': (0.0, 45.0), 'sway': 40.0,
+                 'radius_range': (1.5, 5.0), 'alpha_range': (0.1, 0.35)},
+        'dramatic': {'count': 4000, 'velocity': (0.0, -70.0), 'sway': 15.0,
+                     'radius_range': (1.0, 3.5), 'alpha_range': (0.2, 0.55)},
+    }
+    
+    def __init__(self, enable_ai=True, render_workers=None, backend='auto',
+                 render_scale=1.0, render_fps=None, frame_interpolation='duplicate'):
+        """
+        Initialize the animation generator.
+        
+        Args:
+            enable_ai (bool): Use Gemini for visual styles (render workers disable this)
+            render_workers (int): Processes used for frame rendering (None = all cores, 1 = serial)
+            backend (str): Rasterizer: 'numba' (fused JIT kernels), 'numpy' or 'auto'
+            render_scale (float): Internal render resolution relative to 1080x1920
+            render_fps (int): Internal render frame rate (None = output fps)
+            frame_interpolation (str): How FFmpeg fills output frames when render_fps
+                is lower: 'duplicate' (repeat frames) or 'blend' (crossfade)
+        """
+        self.gemini_available = enable_ai and bool(settings.GEMINI_API_KEY)
         if self.gemini_available:
             genai.configure(api_key=settings.GEMINI_API_KEY)
             self.model = genai.GenerativeModel('gemini-pro')
@@ -39,44 +94,126 @@ class AnimationGenerator:
         self.width = 1080
         self.height = 1920
         self.fps = 30
+        self.render_workers = render_workers or os.cpu_count() or 1
+        self.frames_per_task = 4  # Frames rendered per worker task
+        
+        # Rasterization backend (both produce identical frames)
+        if backend == 'auto':
+            backend = 'numba' if animation_kernels.NUMBA_AVAILABLE else 'numpy'
+        elif backend == 'numba' and not animation_kernels.NUMBA_AVAILABLE:
+            print("⚠️  numba not installed - falling back to NumPy rasterizer")
+            backend = 'numpy'
+        self.backend = backend
+        self.ring_memory_limit = 256 * 1024 * 1024  # Shared frame ring budget
+        
+        # Compositing caches (reused across frames)
+        self._sprite_cache = OrderedDict()
+        self._sprite_cache_bytes = 0
+        self._sprite_cache_limit = 64 * 1024 * 1024  # 64 MB of alpha sprites
+        
+        # Visual styles by (mood, tempo bucket, energy bucket), loaded lazily from disk
+        self._style_cache = None
+        
+        self.configure_render(render_scale, render_fps, frame_interpolation)
+    
+    def configure_render(self, render_scale=1.0, render_fps=None, frame_interpolation='duplicate'):
+        """
+        Set the internal render resolution and frame rate.
+        
+        Frames are rasterized at render size/fps and FFmpeg upscales them
+        (lanczos) and fills in frames to reach the output 1080x1920 @ 30fps
+        during the final encode. The soft gradients and circles have no fine
+        detail, so 0.5 scale at 15 fps cuts Python-side pixel work by 8x.
+        
+        Args:
+            render_scale (float): Render resolution relative to the output (0 < scale <= 1)
+            render_fps (int): Render frame rate (None = output fps)
+            frame_interpolation (str): 'duplicate' or 'blend'
+        """
+        if not 0 < render_scale <= 1:
+            raise ValueError("render_scale must be in (0, 1]")
+        if frame_interpolation not in ('duplicate', 'blend'):
+            raise ValueError("frame_interpolation must be 'duplicate' or 'blend'")
+        
+        self.render_scale = render_scale
+        # Keep dimensions even for the encoder's chroma subsampling
+        self.render_width = max(2, int(round(self.width * render_scale / 2)) * 2)
+        self.render_height = max(2, int(round(self.height * render_scale / 2)) * 2)
+        self.render_fps = min(render_fps or self.fps, self.fps)
+        self.frame_interpolation = frame_interpolation
+        
+        # Size-dependent buffers and caches
+        self._sprite_cache.clear()
+        self._sprite_cache_bytes = 0
+        self._blend_buffer = np.empty((self.render_height, self.render_width, 4), dtype=np.float32)  # Fits BGRA layers too
+        self._background_cache = {}
+        # intp so np.take does not convert (and allocate) the indices every frame
+        self._wave_index = np.empty((self.render_height, self.render_width), dtype=np.intp)
     
-    def create_animated_short(self, audio_path, output_path, duration=None):
+    def create_animated_short(self, audio_path, output_path, duration=None,
+                              render_scale=None, render_fps=None, start=None,
+                              preview=False, visual_style=None, title=None, hashtags=None):
         """
         Create a vibrant animated short synchronized to audio.
         
         Args:
-            audio_path (str): Path to audio file
+            audio_path (str): Path to audio file (or a video file with audio)
             output_path (str): Path to save output video
             duration (float): Duration in seconds (None = use full audio)
+            render_scale (float): Override the internal render resolution (see configure_render)
+            render_fps (int): Override the internal render frame rate
+            start (float): Audio start offset in seconds
+            preview (bool): Render only the loudest PREVIEW_SECONDS at PREVIEW_SCALE and
+                PREVIEW_FPS, encoded at that size, so the style can be approved quickly
+            visual_style (dict): Reuse a style (e.g. the one approved from a preview)
+            title (str): Title text shown near the top
+            hashtags (str): Hashtag line shown near the bottom
             
         Returns:
             dict: Generation results
         """
+        previous_config = (self.render_scale, self.render_fps, self.frame_interpolation, self.render_workers)
         try:
-            print(f"\n🎨 Creating animated short from audio...")
+            print(f"\n🎨 Creating animated {'preview' if preview else 'short'} from audio...")
+            
+            if preview:
+                # A few small frames: a worker pool would cost more than it saves
+                self.configure_render(self.PREVIEW_SCALE, self.PREVIEW_FPS, 'duplicate')
+                self.render_workers = 1
+            elif render_scale is not None or render_fps is not None:
+                self.configure_render(
+                    render_scale if render_scale is not None else self.render_scale,
+                    render_fps if render_fps is not None else self.render_fps,
+                    self.frame_interpolation
+                )
             
             # Load and analyze audio
-            audio_analysis = self._analyze_audio(audio_path, duration)
+            audio_analysis = self._analyze_audio(audio_path, duration, start=start)
             
             if not audio_analysis['success']:
                 raise Exception(audio_analysis.get('error', 'Audio analysis failed'))
             
             # Get AI-guided visual style
-            visual_style = self._get_visual_style(audio_analysis)
+            if visual_style is None:
+                visual_style = self._get_visual_style(audio_analysis)
             
             print(f"🎵 Audio: {audio_analysis['tempo']:.0f} BPM, {audio_analysis['mood']} mood")
             print(f"🎨 Style: {visual_style['animation_style']}")
             print(f"🌈 Colors: {', '.join(visual_style['color_scheme'][:3])}")
             
             # Use FAST rendering method (OpenCV + FFmpeg)
-            self._generate_animation_fast(audio_analysis, visual_style, output_path, audio_path)
+            self._generate_animation_fast(
+                audio_analysis, visual_style, output_path, audio_path, start=start, preview=preview,
+                title=title, hashtags=hashtags
+            )
             
             return {
                 'success': True,
                 'output_path': output_path,
                 'duration': audio_analysis['duration'],
                 'style': visual_style,
-                'audio_analysis': audio_analysis
+                'audio_analysis': audio_analysis,
+                'preview': preview
             }
             
         except Exception as e:
@@ -85,53 +222,160 @@ class AnimationGenerator:
                 'success': False,
                 'error': get_error_message(e, "Animation generation")
             }
+        finally:
+            if preview:
+                self.configure_render(*previous_config[:3])
+                self.render_workers = previous_config[3]
+    
+    def create_overlay_short(self, video_path, output_path, start=0, duration=None,
+                             base_filter=None, overlay_scale=0.5, overlay_fps=15, visual_style=None,
+                             title=None, hashtags=None, preview=False):
+        """
+        Create a short with an audio-reactive effects layer over the source video.
+        
+        The effects (shapes and particles, no background) are rendered as a
+        low-resolution BGRA layer and piped into FFmpeg, which reframes the source
+        video, upscales the layer and composites it in the same encode. Title and
+        hashtags are the only full-resolution pixels: they ride along in a text
+        sheet below the layer and are composited after the upscale, so they stay sharp.
+        
+        Args:
+            video_path (str): Source video (its audio drives the effects)
+            output_path (str): Path to save output video
+            start (float): Segment start in seconds
+            duration (float): Segment duration in seconds (None = up to 60s)
+            base_filter (str): FFmpeg filter reframing the source to 1080x1920
+                (None = fit and pad)
+            overlay_scale (float): Effects layer resolution relative to 1080x1920
+            overlay_fps (int): Effects layer frame rate
+            visual_style (dict): Reuse a style (e.g. the one approved from a preview)
+            title (str): Title text shown near the top
+            hashtags (str): Hashtag line shown near the bottom
+            preview (bool): Render only the loudest PREVIEW_SECONDS at PREVIEW_SCALE and
+                PREVIEW_FPS, encoded at that size, so the style can be approved quickly
+            
+        Returns:
+            dict: Generation results
+        """
+        render_workers = self.render_workers
+        try:
+            print(f"\n🎨 Creating overlay {'preview' if preview else 'short'} from video...")
+            if preview:
+                # A few small frames: a worker pool would cost more than it saves
+                self.configure_render(self.PREVIEW_SCALE, self.PREVIEW_FPS, 'duplicate')
+                self.render_workers = 1
+            else:
+                self.configure_render(overlay_scale, overlay_fps, self.frame_interpolation)
+            
+            # Always the whole segment, so a preview warms the cache for the final render
+            audio_analysis = self._analyze_audio(video_path, duration, start=start)
+            if not audio_analysis['success']:
+                raise Exception(audio_analysis.get('error', 'Audio analysis failed'))
+            
+            if visual_style is None:
+                visual_style = self._get_visual_style(audio_analysis)
+            
+            print(f"🎵 Audio: {audio_analysis['tempo']:.0f} BPM, {audio_analysis['mood']} mood")
+            print(f"🎨 Style: {visual_style['animation_style']}")
+            
+            duration = audio_analysis['duration']
+            colors = [color[::-1] for color in self._parse_colors(visual_style['color_scheme'])]
+            total_frames = int(duration * self.render_fps)
+            envelope = audio_analysis.get('envelope') or self._build_envelope(duration, audio_analysis.get('beats', []))
+            
+            timeline = self._compile_timeline(
+                total_frames, duration, audio_analysis.get('tempo', 120), audio_analysis.get('mood', 'energetic'),
+                envelope, layer=True
+            )
+            if preview:
+                # Encoded at the render size, so text drawn into the layer is already sharp
+                timeline['text'] = self._compile_text_overlays(total_frames, duration, envelope, title, hashtags)
+            else:
+                text = self._compile_text_overlays(
+                    total_frames, duration, envelope, title, hashtags, output_size=True
+                )
+                if text:
+                    timeline['text_sheet'] = self._layout_text_sheet(text)
+            
+            clip_start, clip_duration = start, duration
+            if preview:
+                # Only the loudest few seconds, with the matching slice of the source
+                first, last = self._preview_window(timeline, envelope)
+                timeline = self._slice_timeline(timeline, first, last)
+                total_frames = last - first
+                clip_start = start + first / self.render_fps
+                clip_duration = total_frames / self.render_fps
+            
+            cmd = self._build_overlay_command(
+                video_path, clip_start, clip_duration, base_filter, output_path,
+                scale_output=not preview, text_sheet=timeline.get('text_sheet')
+            )
+            self._encode_frames(cmd, total_frames, {'timeline': timeline, 'colors': colors})
+            
+            print(f"✅ Overlay {'preview' if preview else 'short'} created: {output_path}")
+            return {
+                'success': True,
+                'output_path': output_path,
+                'duration': clip_duration,
+                'style': visual_style,
+                'audio_analysis': audio_analysis,
+                'preview': preview
+            }
+            
+        except Exception as e:
+            handle_error(e, context="Overlay generation", show_traceback=True)
+            return {
+                'success': False,
+                'error': get_error_message(e, "Overlay generation")
+            }
+        finally:
+            self.render_workers = render_workers
     
-    def _analyze_audio(self, audio_path, max_duration=None):
-        """Analyze audio for tempo, beats, and energy."""
+    def _analyze_audio(self, audio_path, max_duration=None, start=None):
+        """Analyze audio (optionally from start seconds in) for tempo, beats, and energy."""
         if not LIBROSA_AVAILABLE:
+            duration = max_duration or 30
             return {
                 'success': True,
                 'tempo': 120.0,
                 'beats': [],
                 'energy': 0.5,
                 'mood': 'energetic',
-                'duration': max_duration or 30,
+                'duration': duration,
+                'envelope': self._build_envelope(duration, []),
                 'fallback': True
             }
         
         try:
-            # Load audio
-            y, sr = librosa.load(audio_path, duration=max_duration or 60)
-            
-            # Tempo and beats
-            tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
-            beat_times = librosa.frames_to_time(beat_frames, sr=sr)
-            
-            # Energy
-            rms = librosa.feature.rms(y=y)[0]
-            energy = float(np.mean(rms))
-            
-            # Spectral features
-            spectral_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            brightness = float(np.mean(spectral_centroid))
-            
-            # Determine mood
-            if tempo < 80:
-                mood = "calm" if energy < 0.3 else "dramatic"
-            elif tempo < 120:
-                mood = "romantic" if energy < 0.5 else "upbeat"
+            # Reuse features from a previous render of the same audio
+            cache_key = self._analysis_cache_key(audio_path, max_duration, start)
+            features = self._load_cached_analysis(cache_key)
+            if features is None:
+                features = self._extract_audio_features(audio_path, max_duration, start)
+                self._store_cached_analysis(cache_key, features)
             else:
-                mood = "energetic" if energy > 0.6 else "motivational"
+                print(f"♻️  Using cached audio analysis ({cache_key[:12]})")
+            
+            tempo = features['tempo']
+            energy = features['energy']
+            
+            mood = self._classify_mood(tempo, energy)
+            duration = features['duration']
+            beat_times = features['beat_times']
             
             return {
                 'success': True,
-                'tempo': float(tempo),
+                'tempo': tempo,
                 'beats': beat_times.tolist(),
                 'energy': energy,
-                'brightness': brightness,
+                'brightness': features['brightness'],
                 'mood': mood,
-                'duration': len(y) / sr,
-                'sample_rate': sr
+                'duration': duration,
+                'sample_rate': features['sample_rate'],
+                'envelope': self._build_envelope(
+                    duration, beat_times, features['feature_times'],
+                    {name: features[name] for name in self.ENVELOPE_FEATURES}
+                )
             }
             
         except Exception as e:
@@ -141,15 +385,317 @@ class AnimationGenerator:
                 'error': str(e)
             }
     
+    def _classify_mood(self, tempo, energy):
+        """Map tempo (BPM) and energy to a mood name."""
+        if tempo < 80:
+            return "calm" if energy < 0.3 else "dramatic"
+        elif tempo < 120:
+            return "romantic" if energy < 0.5 else "upbeat"
+        else:
+            return "energetic" if energy > 0.6 else "motivational"
+    
+    def _extract_audio_features(self, audio_path, max_duration=None, start=None):
+        """
+        Extract tempo, beats and frame-level features from the audio.
+        
+        Decoding streams through FFmpeg when it is available; librosa.load is the
+        fallback. Either way a single streaming STFT produces all frame-level
+        features and librosa only runs beat tracking on the onset envelope.
+        
+        Returns:
+            dict: Scalars (tempo, energy, brightness, duration, sample_rate) and
+                  arrays (beat_times, feature_times and ENVELOPE_FEATURES)
+        """
+        sr = self.ANALYSIS_SAMPLE_RATE
+        hop_length = 512
+        
+        # One STFT pass yields every per-frame feature (RMS, onset, flux, bands)
+        extractor = StreamingFeatureExtractor(sr, hop_length=hop_length)
+        if ffmpeg_available():
+            # Stream PCM from FFmpeg chunk by chunk (flat memory)
+            for chunk in stream_pcm(audio_path, sr, duration=max_duration or 60, start=start):
+                extractor.feed(chunk)
+        else:
+            y, _ = librosa.load(audio_path, sr=sr, offset=start or 0.0, duration=max_duration or 60)
+            extractor.feed(y)
+        stream = extractor.finish()
+        
+        # Tempo and beats only need the onset envelope, not the samples
+        tempo, beat_frames = librosa.beat.beat_track(onset_envelope=stream['onset'], sr=sr, hop_length=hop_length)
+        beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop_length)
+        
+        features = {
+            'tempo': float(np.atleast_1d(tempo)[0]),
+            'energy': float(np.mean(stream['rms'])),
+            'brightness': float(np.mean(stream['centroid'])),
+            'duration': stream['duration'],
+            'sample_rate': sr,
+            'beat_times': np.asarray(beat_times, dtype=np.float64),
+            'feature_times': np.asarray(stream['times'], dtype=np.float64),
+        }
+        for name in self.ENVELOPE_FEATURES:
+            features[name] = np.asarray(stream[name], dtype=np.float32)
+        return features
+    
+    def _analysis_cache_key(self, audio_path, max_duration=None, start=None):
+        """
+        Build the analysis cache key from the audio file's identity and analysis parameters.
+        
+        The file is identified by its absolute path, size and modification time
+        rather than a hash of its content, so the key costs one stat() no matter
+        how long the download is; replacing or editing the file changes the key.
+        
+        Args:
+            audio_path (str): Path to the audio file
+            max_duration (float): Analysis duration limit
+            start (float): Analysis start offset in seconds
+            
+        Returns:
+            str: Hex digest identifying this exact analysis
+        """
+        stat = os.stat(audio_path)
+        params = {
+            'path': str(Path(audio_path).resolve()),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'version': self.ANALYSIS_VERSION,
+            'sample_rate': self.ANALYSIS_SAMPLE_RATE,
+            'max_duration': max_duration or 60,
+            'start': start or 0,
+        }
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    
+    def _analysis_cache_dir(self):
+        """Directory holding cached audio analyses."""
+        return Path(getattr(settings, 'CACHE_DIR', Path('cache'))) / 'audio_analysis'
+    
+    def _load_cached_analysis(self, cache_key):
+        """
+        Load cached audio features.
+        
+        Returns:
+            dict: Features as produced by _extract_audio_features, or None on a miss
+        """
+        cache_path = self._analysis_cache_dir() / f"{cache_key}.npz"
+        if not cache_path.exists():
+            return None
+        
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                features = json.loads(str(data['metadata']))
+                for name in self.ANALYSIS_ARRAYS:
+                    features[name] = data[name]
+            return features
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable analysis cache {cache_path.name}: {e}")
+            return None
+    
+    def _store_cached_analysis(self, cache_key, features):
+        """Store audio features as compressed arrays plus JSON metadata."""
+        cache_dir = self._analysis_cache_dir()
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            metadata = {k: v for k, v in features.items() if k not in self.ANALYSIS_ARRAYS}
+            arrays = {name: features[name] for name in self.ANALYSIS_ARRAYS}
+            
+            # Write to a temp file and rename so readers never see a partial file
+            temp_path = cache_dir / f"{cache_key}.{os.getpid()}.tmp.npz"
+            np.savez_compressed(temp_path, metadata=np.array(json.dumps(metadata)), **arrays)
+            os.replace(temp_path, cache_dir / f"{cache_key}.npz")
+        except Exception as e:
+            print(f"⚠️  Could not cache audio analysis: {e}")
+    
+    def _build_envelope(self, duration, beat_times, feature_times=None, features=None):
+        """
+        Build per-frame audio envelopes sampled at the animation frame rate.
+        
+        Beat intensity is a decay kernel around each beat (fast attack, slower
+        release), located with a single searchsorted over all frame times.
+        Frame-level audio features (onset strength, RMS, spectral flux and
+        bass/mid/treble band energies) are resampled to frame times and
+        normalized to 0-1.
+        
+        Args:
+            duration (float): Audio duration in seconds
+            beat_times (array): Beat times in seconds
+            feature_times (array): Times of the audio feature frames
+            features (dict): Feature name -> values per feature frame
+            
+        Returns:
+            dict: float32 arrays 'beat' plus one per ENVELOPE_FEATURES name,
+                  one value per frame (missing features are all zeros)
+        """
+        total_frames = max(int(duration * self.render_fps), 1)
+        frame_times = np.arange(total_frames) / self.render_fps
+        
+        beat = np.zeros(total_frames, dtype=np.float32)
+        beat_times = np.asarray(beat_times, dtype=np.float64)
+        if len(beat_times) > 0:
+            attack, release = 0.03, 0.15  # seconds
+            following = np.searchsorted(beat_times, frame_times, side='left')
+            
+            # Release after the most recent beat
+            previous = following - 1
+            has_previous = previous >= 0
+            since = frame_times[has_previous] - beat_times[previous[has_previous]]
+            beat[has_previous] = np.exp(-since / release)
+            
+            # Short attack ramp leading into the next beat
+            has_next = following < len(beat_times)
+            until = beat_times[following[has_next]] - frame_times[has_next]
+            beat[has_next] = np.maximum(beat[has_next], np.exp(-until / attack))
+        
+        def resample(values):
+            if values is None or feature_times is None or len(values) == 0:
+                return np.zeros(total_frames, dtype=np.float32)
+            resampled = np.interp(frame_times, feature_times, values)
+            peak = resampled.max()
+            if peak > 0:
+                resampled = resampled / peak
+            return resampled.astype(np.float32)
+        
+        features = features or {}
+        envelope = {'beat': beat}
+        for name in self.ENVELOPE_FEATURES:
+            envelope[name] = resample(features.get(name))
+        return envelope
+    
     def _get_visual_style(self, audio_analysis):
-        """Get AI-guided visual style based on audio."""
+        """
+        Get AI-guided visual style based on audio.
+        
+        Styles are cached by mood plus bucketed tempo and energy, so Gemini is
+        only asked once per bucket (see prewarm_style_cache). Default styles are
+        never cached, so a later run with Gemini available can still fill the bucket.
+        """
         mood = audio_analysis.get('mood', 'energetic')
         tempo = audio_analysis.get('tempo', 120)
         energy = audio_analysis.get('energy', 0.5)
         
+        key, bucket_tempo, bucket_energy = self._style_bucket(mood, tempo, energy)
+        cached = self._load_style_cache().get(key)
+        if cached is not None:
+            print(f"♻️  Using cached visual style ({key})")
+            return dict(cached, mood=mood)
+        
         if not self.gemini_available:
             return self._get_default_style(mood, tempo, energy)
         
+        style = self._request_ai_style(mood, bucket_tempo, bucket_energy)
+        if style is None:
+            return self._get_default_style(mood, tempo, energy)
+        
+        self._store_style(key, style)
+        return style
+    
+    def prewarm_style_cache(self, force=False):
+        """
+        Fill the visual style cache for every tempo/energy bucket.
+        
+        Args:
+            force (bool): Regenerate buckets that are already cached
+            
+        Returns:
+            dict: success, generated/cached/failed counts
+        """
+        if not self.gemini_available:
+            return {'success': False, 'error': 'Gemini API key not configured'}
+        
+        cache = self._load_style_cache()
+        generated = cached = failed = 0
+        
+        for tempo_index in range(len(self.TEMPO_BUCKET_EDGES) + 1):
+            for energy_index in range(len(self.ENERGY_BUCKET_EDGES) + 1):
+                tempo = self._bucket_center(tempo_index, self.TEMPO_BUCKET_EDGES, 20)
+                energy = self._bucket_center(energy_index, self.ENERGY_BUCKET_EDGES, 0.1)
+                mood = self._classify_mood(tempo, energy)
+                key = self._style_bucket(mood, tempo, energy)[0]
+                
+                if key in cache and not force:
+                    cached += 1
+                    continue
+                
+                style = self._request_ai_style(mood, tempo, energy)
+                if style is None:
+                    failed += 1
+                    continue
+                
+                self._store_style(key, style)
+                generated += 1
+                print(f"   🎨 {key}: {style['animation_style']}")
+        
+        return {
+            'success': failed == 0,
+            'generated': generated,
+            'cached': cached,
+            'failed': failed
+        }
+    
+    def _style_bucket(self, mood, tempo, energy):
+        """
+        Quantize audio parameters to a style cache bucket.
+        
+        Returns:
+            tuple: (cache key, bucket center tempo, bucket center energy)
+        """
+        tempo_index = int(np.searchsorted(self.TEMPO_BUCKET_EDGES, tempo, side='right'))
+        energy_index = int(np.searchsorted(self.ENERGY_BUCKET_EDGES, energy, side='right'))
+        key = f"{mood}:t{tempo_index}:e{energy_index}"
+        return (
+            key,
+            self._bucket_center(tempo_index, self.TEMPO_BUCKET_EDGES, 20),
+            self._bucket_center(energy_index, self.ENERGY_BUCKET_EDGES, 0.1)
+        )
+    
+    def _bucket_center(self, index, edges, open_width):
+        """Representative value of bucket index (open-ended buckets extend by open_width)."""
+        low = edges[index - 1] if index > 0 else edges[0] - open_width
+        high = edges[index] if index < len(edges) else edges[-1] + open_width
+        return (low + high) / 2
+    
+    def _style_cache_path(self):
+        """File holding cached visual styles."""
+        return Path(getattr(settings, 'CACHE_DIR', Path('cache'))) / 'visual_styles.json'
+    
+    def _load_style_cache(self):
+        """Load the style cache from disk once per generator."""
+        if self._style_cache is not None:
+            return self._style_cache
+        
+        self._style_cache = {}
+        cache_path = self._style_cache_path()
+        if cache_path.exists():
+            try:
+                data = json.loads(cache_path.read_text())
+                if data.get('version') == self.STYLE_CACHE_VERSION:
+                    self._style_cache = data.get('styles', {})
+            except Exception as e:
+                print(f"⚠️  Ignoring unreadable style cache {cache_path.name}: {e}")
+        return self._style_cache
+    
+    def _store_style(self, key, style):
+        """Add a style to the cache and persist it."""
+        cache = self._load_style_cache()
+        cache[key] = style
+        
+        cache_path = self._style_cache_path()
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Write to a temp file and rename so readers never see a partial file
+            temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps({'version': self.STYLE_CACHE_VERSION, 'styles': cache}, indent=2))
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            print(f"⚠️  Could not cache visual style: {e}")
+    
+    def _request_ai_style(self, mood, tempo, energy):
+        """
+        Ask Gemini for a visual style.
+        
+        Returns:
+            dict: Visual style, or None if the request failed
+        """
         try:
             prompt = f"""
             Create a vibrant visual style for a music animation.
@@ -195,7 +741,7 @@ class AnimationGenerator:
             
         except Exception as e:
             print(f"⚠️  AI style generation failed: {e}")
-            return self._get_default_style(mood, tempo, energy)
+            return None
     
     def _get_default_style(self, mood, tempo, energy):
         """Get default visual style based on mood."""
@@ -241,166 +787,846 @@ class AnimationGenerator:
             'ai_generated': False
         }
     
-    def _generate_animation_fast(self, audio_analysis, visual_style, output_path, audio_path):
-        """Generate animation using fast batch rendering with OpenCV."""
+    def _generate_animation_fast(self, audio_analysis, visual_style, output_path, audio_path,
+                                 start=None, preview=False, title=None, hashtags=None):
+        """Generate animation by streaming rendered frames into a single FFmpeg encode."""
         duration = audio_analysis['duration']
         beats = audio_analysis.get('beats', [])
         tempo = audio_analysis.get('tempo', 120)
         mood = audio_analysis.get('mood', 'energetic')
         
-        # Parse colors
-        colors = self._parse_colors(visual_style['color_scheme'])
+        # Parse colors, pre-swizzled to BGR to match the encoder's bgr24 input
+        colors = [color[::-1] for color in self._parse_colors(visual_style['color_scheme'])]
         
         # Calculate total frames
-        total_frames = int(duration * self.fps)
-        print(f"⚡ FAST MODE: Rendering {total_frames} frames at {self.fps} FPS...")
-        print(f"   Expected time: 3-5 minutes (optimized rendering)")
-        
-        # Create temporary video file (no audio)
-        temp_video = output_path.replace('.mp4', '_temp.mp4')
-        
-        # Initialize video writer with OpenCV (much faster!)
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(temp_video, fourcc, self.fps, (self.width, self.height))
-        
-        # Render frames in batches
-        batch_size = 30  # Render 30 frames at a time
-        for i in range(0, total_frames, batch_size):
-            batch_end = min(i + batch_size, total_frames)
-            
-            # Render batch
-            for frame_num in range(i, batch_end):
-                t = frame_num / self.fps
-                frame = self._render_frame(t, duration, beats, tempo, mood, colors)
-                
-                # Convert RGB to BGR for OpenCV
-                frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                out.write(frame_bgr)
-            
-            # Progress update
-            progress = (batch_end / total_frames) * 100
-            print(f"   Progress: {progress:.1f}% ({batch_end}/{total_frames} frames)")
+        total_frames = int(duration * self.render_fps)
+        envelope = audio_analysis.get('envelope') or self._build_envelope(duration, beats)
+        
+        # Compile all animated parameters up front; the render loop only rasterizes
+        timeline = self._compile_timeline(total_frames, duration, tempo, mood, envelope)
+        timeline['text'] = self._compile_text_overlays(total_frames, duration, envelope, title, hashtags)
+        audio_start = start or 0
+        
+        if preview:
+            # Only the loudest few seconds, with the matching slice of audio
+            first, last = self._preview_window(timeline, envelope)
+            timeline = self._slice_timeline(timeline, first, last)
+            total_frames = last - first
+            audio_start += first / self.render_fps
+        
+        render_args = {
+            'timeline': timeline,
+            'colors': colors,
+        }
+        
+        # Stream raw frames straight into FFmpeg, which upscales, fills in frames
+        # up to the output fps and muxes the audio in a single encode
+        cmd = self._build_encode_command(audio_path, output_path, audio_start=audio_start, scale_output=not preview)
+        self._encode_frames(cmd, total_frames, render_args)
+        
+        print(f"✅ Final video created: {output_path}")
+        return output_path
+    
+    def _preview_window(self, timeline, envelope):
+        """
+        Pick the loudest PREVIEW_SECONDS of the timeline.
+        
+        Returns:
+            tuple: (first, last) frame range
+        """
+        total_frames = timeline['total_frames']
+        window = min(int(self.PREVIEW_SECONDS * self.render_fps), total_frames)
+        if window == total_frames:
+            return 0, total_frames
+        
+        # Sliding-window loudness from a prefix sum of the per-frame RMS
+        rms = envelope['rms'][np.minimum(np.arange(total_frames), len(envelope['rms']) - 1)]
+        cumulative = np.concatenate(([0.0], np.cumsum(rms, dtype=np.float64)))
+        first = int(np.argmax(cumulative[window:] - cumulative[:-window]))
+        return first, first + window
+    
+    def _slice_timeline(self, timeline, first, last):
+        """Restrict a compiled timeline to frames [first, last)."""
+        total_frames = timeline['total_frames']
+        
+        def slice_value(value):
+            if isinstance(value, np.ndarray) and value.shape[:1] == (total_frames,):
+                return value[first:last]
+            if isinstance(value, list):
+                return [slice_value(item) for item in value]
+            if isinstance(value, dict):
+                return {key: slice_value(item) for key, item in value.items()}
+            return value
+        
+        sliced = slice_value(timeline)
+        sliced['total_frames'] = last - first
+        return sliced
+    
+    def _encode_frames(self, cmd, total_frames, render_args):
+        """
+        Render every frame and stream it into an FFmpeg process.
+        
+        Args:
+            cmd (list): FFmpeg command reading raw frames from stdin
+            total_frames (int): Number of frames to render
+            render_args (dict): Per-clip render parameters
+        """
+        timeline = render_args['timeline']
+        print(f"⚡ FAST MODE: Rendering {total_frames} frames at {self.render_fps} FPS...")
+        if total_frames > 0:
+            estimate = self._estimate_render_time(timeline, render_args)
+            print(f"   Expected time: {estimate:.0f}s (estimated from compiled timeline)")
         
-        out.release()
-        print(f"✅ Video frames rendered!")
+        out = _FFmpegFrameWriter(cmd)
         
-        # Combine with audio using FFmpeg (super fast!)
-        print(f"🎵 Adding audio with FFmpeg...")
-        subprocess.run([
+        try:
+            if self.render_workers > 1 and total_frames > self.frames_per_task:
+                self._render_frames_parallel(out, total_frames, render_args)
+            else:
+                self._render_frames_serial(out, total_frames, render_args)
+        finally:
+            out.close()
+        print(f"✅ Video frames rendered and encoded!")
+    
+    def _build_encode_command(self, audio_path, output_path, audio_start=0, scale_output=True):
+        """
+        Build the FFmpeg command that encodes piped raw BGR frames with audio.
+        
+        Args:
+            audio_path (str): Audio track to mux (the audio stream of a video file works too)
+            output_path (str): Output video path
+            audio_start (float): Offset into the audio in seconds
+            scale_output (bool): Upscale to the output size/fps (False = encode as rendered)
+            
+        Returns:
+            list: FFmpeg command line
+        """
+        filters = []
+        if scale_output and (self.render_width, self.render_height) != (self.width, self.height):
+            filters.append(f"scale={self.width}:{self.height}:flags=lanczos")
+        if scale_output and self.render_fps != self.fps:
+            if self.frame_interpolation == 'blend':
+                filters.append(f"minterpolate=fps={self.fps}:mi_mode=blend")
+            else:
+                filters.append(f"fps={self.fps}")
+        
+        cmd = [
             'ffmpeg', '-y',
-            '-i', temp_video,
-            '-i', audio_path,
+            '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'bgr24',
+            '-s', f"{self.render_width}x{self.render_height}",
+            '-r', str(self.render_fps),
+            '-i', '-',
+        ]
+        if audio_start:
+            cmd += ['-ss', str(audio_start)]
+        cmd += ['-i', str(audio_path)]
+        if filters:
+            cmd += ['-vf', ','.join(filters)]
+        cmd += [
+            '-map', '0:v',
+            '-map', '1:a',
             '-c:v', 'libx264',
+            '-preset', 'ultrafast',  # Fast encoding
+            '-pix_fmt', 'yuv420p',
             '-c:a', 'aac',
             '-shortest',
-            '-preset', 'ultrafast',  # Fast encoding
             output_path
-        ], capture_output=True, check=True)
+        ]
+        return cmd
+    
+    def _build_overlay_command(self, video_path, start, duration, base_filter, output_path, scale_output=True,
+                               text_sheet=None):
+        """
+        Build the FFmpeg command that composites piped BGRA effect frames over a video.
         
-        # Clean up temp file
-        if os.path.exists(temp_video):
-            os.remove(temp_video)
+        With a text sheet, each piped frame is the effects layer (top left) above
+        the full-width sheet; the layer is cropped out and upscaled, then every text
+        band is cropped out and overlaid at its output position, unscaled.
         
-        print(f"✅ Final video created: {output_path}")
-        return output_path
+        Args:
+            video_path (str): Source video (input 0, provides picture and audio)
+            start (float): Segment start in seconds
+            duration (float): Segment duration in seconds
+            base_filter (str): Filter reframing the source to the output size
+            output_path (str): Output video path
+            scale_output (bool): Composite at the output size; if False, the reframed
+                source is scaled down to the render size instead (previews)
+            text_sheet (dict): Full-resolution text bands from _layout_text_sheet (optional)
+            
+        Returns:
+            list: FFmpeg command line
+        """
+        if base_filter is None:
+            base_filter = (
+                f"scale={self.width}:{self.height}:force_original_aspect_ratio=decrease,"
+                f"pad={self.width}:{self.height}:(ow-iw)/2:(oh-ih)/2"
+            )
+        
+        if scale_output:
+            layer_filter = f"scale={self.width}:{self.height}:flags=bilinear"
+        else:
+            base_filter += f",scale={self.render_width}:{self.render_height}:flags=area"
+            layer_filter = 'null'
+        
+        # Layer and text colors are premultiplied by their alpha
+        bands = text_sheet['bands'] if text_sheet else []
+        frame_height, frame_width = self._layer_frame_size(text_sheet)
+        filters = [f"[0:v]{base_filter}[base]"]
+        if bands:
+            filters.append(f"[1:v]split={len(bands) + 1}[layer]" + ''.join(f"[sheet{i}]" for i in range(len(bands))))
+            filters.append(f"[layer]crop={self.render_width}:{self.render_height}:0:0,{layer_filter}[fx]")
+            for i, (_, sheet_top, height) in enumerate(bands):
+                filters.append(f"[sheet{i}]crop={self.width}:{height}:0:{self.render_height + sheet_top}[text{i}]")
+        else:
+            filters.append(f"[1:v]{layer_filter}[fx]")
+        filters.append(f"[base][fx]overlay=alpha=premultiplied:shortest=1[{'v0' if bands else 'v'}]")
+        for i, (top, _, _) in enumerate(bands):
+            output = 'v' if i == len(bands) - 1 else f"v{i + 1}"
+            filters.append(f"[v{i}][text{i}]overlay=0:{top}:alpha=premultiplied[{output}]")
+        filter_complex = ';'.join(filters)
+        
+        return [
+            'ffmpeg', '-y',
+            '-loglevel', 'error',
+            '-ss', str(start),
+            '-t', str(duration),
+            '-i', str(video_path),
+            '-f', 'rawvideo',
+            '-pix_fmt', 'bgra',
+            '-s', f"{frame_width}x{frame_height}",
+            '-r', str(self.render_fps),
+            '-i', '-',
+            '-filter_complex', filter_complex,
+            '-map', '[v]',
+            '-map', '0:a?',
+            '-c:v', 'libx264',
+            '-preset', 'veryfast',
+            '-crf', '23',
+            '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac',
+            '-maxrate', '12M',
+            '-bufsize', '24M',
+            '-movflags', '+faststart',
+            str(output_path)
+        ]
+    
+    def _frame_shape(self, render_args):
+        """Shape of one encoder frame: BGR, or BGRA for effect layers (plus any text sheet)."""
+        timeline = render_args['timeline']
+        if not timeline.get('layer'):
+            return (self.render_height, self.render_width, 3)
+        return self._layer_frame_size(timeline.get('text_sheet')) + (4,)
     
-    def _render_frame(self, t, duration, beats, tempo, mood, colors):
-        """Render a single frame of animation."""
-        # Create base image
-        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+    def _layer_frame_size(self, text_sheet=None):
+        """(height, width) of a piped effects frame: the layer, with the text sheet stacked below it."""
+        if not text_sheet:
+            return (self.render_height, self.render_width)
+        return (self.render_height + text_sheet['height'], max(self.render_width, self.width))
+    
+    def _render_frames_serial(self, out, total_frames, render_args):
+        """
+        Render all frames on the current process and write them in order.
+        
+        Uses two preallocated frames: a writer thread streams one to the encoder
+        while the next is rendered into the other, so the steady-state loop
+        allocates nothing.
+        """
+        frame_shape = self._frame_shape(render_args)
+        free_frames = queue.Queue()
+        for _ in range(2):
+            free_frames.put(np.empty(frame_shape, dtype=np.uint8))
+        filled_frames = queue.Queue()
+        writer_errors = []
         
-        # Progress through video (0 to 1)
-        progress = t / duration if duration > 0 else 0
+        def write_frames():
+            while True:
+                frame = filled_frames.get()
+                if frame is None:
+                    return
+                try:
+                    if not writer_errors:
+                        out.write(frame)
+                except Exception as e:
+                    writer_errors.append(e)
+                free_frames.put(frame)
         
-        # Check if on a beat
-        on_beat = any(abs(t - beat) < 0.1 for beat in beats) if beats else False
-        beat_intensity = 1.5 if on_beat else 1.0
+        writer = threading.Thread(target=write_frames, daemon=True)
+        writer.start()
         
-        # Render based on mood
-        if mood in ['energetic', 'upbeat']:
-            frame = self._render_energetic(frame, t, progress, colors, beat_intensity, tempo)
-        elif mood in ['calm', 'romantic']:
-            frame = self._render_calm(frame, t, progress, colors)
+        try:
+            # Render frames in batches
+            batch_size = 30  # Render 30 frames at a time
+            for i in range(0, total_frames, batch_size):
+                batch_end = min(i + batch_size, total_frames)
+                
+                for frame_num in range(i, batch_end):
+                    frame = free_frames.get()
+                    if writer_errors:
+                        raise writer_errors[0]
+                    self._render_frame_bgr(frame_num, render_args, frame)
+                    filled_frames.put(frame)
+                
+                # Progress update
+                progress = (batch_end / total_frames) * 100
+                print(f"   Progress: {progress:.1f}% ({batch_end}/{total_frames} frames)")
+        finally:
+            filled_frames.put(None)
+            writer.join()
+        
+        if writer_errors:
+            raise writer_errors[0]
+    
+    def _render_frames_parallel(self, out, total_frames, render_args):
+        """
+        Render frames on a process pool through a shared-memory ring buffer.
+        
+        Workers render ranges of frames straight into ring slots (frame n lives in
+        slot n % slots). The parent writes slots to the encoder strictly in frame
+        order and only hands a slot out again once it has been written, so memory
+        stays bounded to the ring no matter how long the clip is.
+        
+        Args:
+            out: Encoder with a write(frame) method
+            total_frames (int): Number of frames to render
+            render_args (dict): Per-clip render parameters shared by all workers
+        """
+        workers = min(self.render_workers, -(-total_frames // self.frames_per_task))
+        chunk = self.frames_per_task
+        frame_shape = self._frame_shape(render_args)
+        frame_bytes = int(np.prod(frame_shape))
+        
+        # Two tasks in flight per worker, capped by the ring memory budget
+        slots = min(workers * chunk * 2, self.ring_memory_limit // frame_bytes)
+        slots = max(slots, workers * 2)
+        
+        print(f"   Parallel render: {workers} workers, {slots}-frame ring "
+              f"({slots * frame_bytes / (1024 * 1024):.0f} MB)")
+        
+        ring_memory = shared_memory.SharedMemory(create=True, size=slots * frame_bytes)
+        try:
+            ring = np.ndarray((slots,) + frame_shape, dtype=np.uint8, buffer=ring_memory.buf)
+            
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_render_worker,
+                initargs=(ring_memory.name, slots, frame_shape, render_args, self._worker_config()),
+            ) as pool:
+                pending = deque()
+                next_frame = 0
+                written = 0
+                last_report = 0
+                
+                while written < total_frames:
+                    # Keep the ring full without overwriting unwritten frames
+                    while next_frame < total_frames and next_frame - written < slots:
+                        end = min(next_frame + chunk, total_frames, written + slots)
+                        pending.append((pool.submit(_render_frame_range, next_frame, end), next_frame, end))
+                        next_frame = end
+                    
+                    # Ordered writer: wait for the oldest range, then stream it out
+                    future, start, end = pending.popleft()
+                    future.result()
+                    for frame_num in range(start, end):
+                        out.write(ring[frame_num % slots])
+                    written = end
+                    
+                    if written - last_report >= 30 or written == total_frames:
+                        last_report = written
+                        progress = (written / total_frames) * 100
+                        print(f"   Progress: {progress:.1f}% ({written}/{total_frames} frames)")
+            
+            del ring
+        finally:
+            ring_memory.close()
+            ring_memory.unlink()
+    
+    def _worker_config(self):
+        """Constructor arguments that reproduce this generator's render setup in a worker."""
+        return {
+            'backend': self.backend,
+            'render_scale': self.render_scale,
+            'render_fps': self.render_fps,
+            'frame_interpolation': self.frame_interpolation,
+        }
+    
+    def _render_frame_bgr(self, frame_num, render_args, out_frame):
+        """
+        Render frame number frame_num into out_frame in the encoder's bgr24 format
+        (bgra for effect layers).
+        
+        render_args['colors'] are already swizzled to BGR, so the renderers write
+        encoder-ready pixels directly with no conversion pass or copy.
+        """
+        timeline = render_args['timeline']
+        if timeline.get('layer'):
+            self._render_layer(frame_num, timeline, render_args['colors'], out_frame)
+        else:
+            self._render_frame(frame_num, timeline, render_args['colors'], out_frame)
+    
+    def _compile_timeline(self, total_frames, duration, tempo, mood, envelope, layer=False):
+        """
+        Evaluate every animated parameter for all frames up front.
+        
+        The render loop then only rasterizes: it reads the background offset and
+        shape positions for a frame from these arrays instead of calling
+        np.sin/np.cos per shape per frame.
+        
+        Args:
+            total_frames (int): Number of frames to render
+            duration (float): Clip duration in seconds
+            tempo (float): Tempo in BPM
+            mood (str): Audio mood (selects the renderer)
+            envelope (dict): Per-frame audio envelopes from _build_envelope
+            layer (bool): Render a transparent effects layer (no background)
+            
+        Returns:
+            dict: Renderer name, layer flag, per-frame background parameters, shape arrays
+                  (circle_x/circle_y/circle_r as int32 and circle_alpha as float32,
+                  all shaped (frames, shapes)) and the particle field with its
+                  per-frame clock and gain
+        """
+        if mood in ['calm', 'romantic']:
+            renderer = 'calm'
         elif mood in ['dramatic', 'motivational']:
-            frame = self._render_dramatic(frame, t, progress, colors, beat_intensity)
+            renderer = 'dramatic'
+        else:
+            renderer = 'energetic'
+        
+        frames = np.arange(total_frames)
+        t = (frames / self.render_fps)[:, np.newaxis]
+        progress = frames / self.render_fps / duration if duration > 0 else np.zeros(total_frames)
+        
+        # Envelopes may be a frame short/long due to rounding; clamp the index
+        env_index = np.minimum(frames, len(envelope['beat']) - 1)
+        beat_intensity = (1.0 + 0.5 * envelope['beat'][env_index])[:, np.newaxis]
+        onset = envelope['onset'][env_index][:, np.newaxis]
+        
+        # Band energies relative to their clip average: louder than usual > 0
+        def band(name):
+            values = envelope[name][env_index]
+            return (values - values.mean())[:, np.newaxis]
+        bass, mid, treble = band('bass'), band('mid'), band('treble')
+        
+        timeline = {'renderer': renderer, 'total_frames': total_frames, 'layer': layer}
+        scale = self.render_scale  # Geometry below is in output (1080x1920) pixels
+        
+        # Particle field: loudness speeds up the particle clock, beats flash them
+        particle_style = self.PARTICLE_STYLES[renderer]
+        particles = ParticleSystem(
+            particle_style['count'], self.render_width, self.render_height,
+            velocity=tuple(v * scale for v in particle_style['velocity']),
+            sway=particle_style['sway'] * scale,
+            radius_range=tuple(max(r * scale, 0.5) for r in particle_style['radius_range']),
+            alpha_range=particle_style['alpha_range']
+        )
+        rms = envelope['rms'][env_index]
+        speed = 1.0 + rms - rms.mean()
+        timeline['particles'] = particles
+        timeline['particle_clock'] = np.concatenate(([0.0], np.cumsum(speed[:-1]))) / self.render_fps
+        timeline['particle_gain'] = (0.6 + 0.4 * envelope['beat'][env_index]).astype(np.float32)
+        
+        if renderer == 'energetic':
+            # Pulsing circles orbiting at the tempo; bass swells them, treble brightens them
+            shapes = np.arange(2)[np.newaxis, :]
+            angle = (shapes / 2) * 2 * np.pi + t * tempo / 60
+            radius = (200 + 100 * np.sin(t * 2 + shapes)) * beat_intensity * (1 + 0.3 * bass) * scale
+            timeline['background_offset'] = self._scroll_offsets(progress)
+            timeline['circle_x'] = (self.render_width / 2 + np.cos(angle) * 300 * scale).astype(np.int32)
+            timeline['circle_y'] = (self.render_height / 2 + np.sin(angle) * 500 * scale).astype(np.int32)
+            timeline['circle_r'] = radius.astype(np.int32)
+            timeline['circle_alpha'] = np.broadcast_to(np.clip(0.3 + 0.2 * treble, 0.05, 1.0), radius.shape).astype(np.float32)
+        
+        elif renderer == 'calm':
+            # Gentle orbs drifting down, brightening with onsets and swelling with mids
+            shapes = np.arange(5)[np.newaxis, :]
+            x = (np.sin(t * 0.5 + shapes) * 0.5 + 0.5) * self.render_width
+            y = ((t * 50 + shapes * 100) * scale) % self.render_height
+            timeline['wave_columns'] = self._wave_column_terms(t[:, 0])
+            timeline['circle_x'] = x.astype(np.int32)
+            timeline['circle_y'] = y.astype(np.int32)
+            timeline['circle_r'] = np.broadcast_to(np.maximum(15 * (1 + 0.5 * mid) * scale, 1), x.shape).astype(np.int32)
+            timeline['circle_alpha'] = np.broadcast_to(0.5 + 0.4 * onset, x.shape).astype(np.float32)
+        
+        else:
+            # Slow orbit with beat/bass-driven radius and mid-driven opacity
+            shapes = np.arange(2)[np.newaxis, :]
+            angle = (shapes / 2) * 2 * np.pi + t * 0.5
+            radius = np.broadcast_to((150 + 100 * beat_intensity + 60 * bass) * scale, angle.shape)
+            timeline['background_offset'] = self._scroll_offsets(progress)
+            timeline['circle_x'] = (self.render_width / 2 + np.cos(angle) * 200 * scale).astype(np.int32)
+            timeline['circle_y'] = (self.render_height / 2 + np.sin(angle) * 300 * scale).astype(np.int32)
+            timeline['circle_r'] = radius.astype(np.int32)
+            timeline['circle_alpha'] = np.broadcast_to(np.clip(0.4 + 0.2 * mid, 0.05, 1.0), radius.shape).astype(np.float32)
+        
+        # Per-frame cost in pixels touched: full background plus each circle's box
+        box_area = (2 * timeline['circle_r'].astype(np.int64) + 1) ** 2
+        timeline['pixel_cost'] = (
+            self.render_width * self.render_height + box_area.sum(axis=1)
+            + particles.count * particles.stamp_area()
+        )
+        
+        return timeline
+    
+    def _scroll_offsets(self, progress):
+        """Row offsets of the scrolling gradients for each frame's progress."""
+        return np.round(progress * self.render_height).astype(np.int32)
+    
+    def _estimate_render_time(self, timeline, render_args):
+        """
+        Estimate total render time from the compiled per-frame pixel cost.
+        
+        Renders the first frame once to warm the sprite/background caches (and
+        the JIT kernels), then times a second render and scales it by the total
+        cost of the timeline.
+        
+        Returns:
+            float: Estimated render time in seconds
+        """
+        sample = np.empty(self._frame_shape(render_args), dtype=np.uint8)
+        self._render_frame_bgr(0, render_args, sample)
+        start = time.perf_counter()
+        self._render_frame_bgr(0, render_args, sample)
+        elapsed = time.perf_counter() - start
+        
+        cost = timeline['pixel_cost']
+        workers = self.render_workers if self.render_workers > 1 else 1
+        return elapsed * float(cost.sum()) / float(cost[0]) / workers
+    
+    def _render_frame(self, frame_num, timeline, colors, frame):
+        """
+        Render a single frame of animation from the compiled timeline.
+        
+        Args:
+            frame_num (int): Frame index into the timeline
+            timeline (dict): Compiled timeline from _compile_timeline
+            colors (list): Color tuples in the frame's channel order
+            frame (np.ndarray): Preallocated uint8 frame, fully overwritten
+            
+        Returns:
+            np.ndarray: The rendered frame
+        """
+        renderer = timeline['renderer']
+        if self.backend == 'numba':
+            self._render_frame_fused(frame, frame_num, timeline, colors)
+        elif renderer == 'calm':
+            self._render_calm(frame, frame_num, timeline, colors)
+        elif renderer == 'dramatic':
+            self._render_dramatic(frame, frame_num, timeline, colors)
         else:
-            frame = self._render_energetic(frame, t, progress, colors, beat_intensity, tempo)
+            self._render_energetic(frame, frame_num, timeline, colors)
         
+        self._draw_particles(frame, frame_num, timeline, colors)
+        self._draw_text(frame, frame_num, timeline)
         return frame
     
-    def _render_energetic(self, frame, t, progress, colors, beat_intensity, tempo):
+    def _render_layer(self, frame_num, timeline, colors, layer):
+        """
+        Render the effects of one frame into a BGRA layer with no background.
+        
+        Shapes and particles are drawn straight into the premultiplied layer with
+        an alpha of 255 appended to each color, so channel 3 accumulates their
+        real coverage and dark colors stay opaque. Text sprites carry their own
+        alpha and are composited onto the layer last, or into the full-resolution
+        text sheet below it when the timeline has one. Padding right of the layer
+        is cropped away by FFmpeg and never cleared.
+        """
+        effects = layer[:self.render_height, :self.render_width]
+        effects.fill(0)
+        layer_colors = [tuple(color) + (255,) for color in colors]
+        self._draw_timeline_circles(effects, frame_num, timeline, layer_colors)
+        self._draw_particles(effects, frame_num, timeline, layer_colors)
+        self._draw_text(effects, frame_num, timeline)
+        
+        # Each band holds a single block over transparency, so sprites are copied in
+        text_sheet = timeline.get('text_sheet')
+        if text_sheet:
+            sheet = layer[self.render_height:, :self.width]
+            sheet.fill(0)
+            for item in text_sheet['text']:
+                item['sprite'].stamp(
+                    sheet, int(item['level'][frame_num]), item['x'], int(item['y'][frame_num]),
+                    float(item['opacity'][frame_num])
+                )
+        return layer
+    
+    def _render_frame_fused(self, frame, frame_num, timeline, colors):
+        """Render a frame with the fused Numba kernels (background + circles in one pass)."""
+        xs = timeline['circle_x'][frame_num]
+        ys = timeline['circle_y'][frame_num]
+        radii = timeline['circle_r'][frame_num]
+        alphas = timeline['circle_alpha'][frame_num]
+        shape_colors = self._get_shape_colors(colors, len(xs))
+        
+        renderer = timeline['renderer']
+        if renderer == 'calm':
+            tables = self._get_wave_tables(colors[0], colors[1])
+            animation_kernels.render_wave_frame(
+                frame, tables['lut'], tables['row_term'][:, 0], timeline['wave_columns'][frame_num],
+                self.WAVE_LEVELS - 1, xs, ys, radii, alphas, shape_colors
+            )
+        else:
+            if renderer == 'dramatic':
+                c2 = colors[1] if len(colors) > 1 else colors[0]
+                period = 2 * self.render_height
+            else:
+                c2 = colors[1]
+                period = self.render_height
+            table = self._get_gradient_table(colors[0], c2, period)
+            offset = int(timeline['background_offset'][frame_num]) % period
+            animation_kernels.render_scroll_frame(
+                frame, table, offset, xs, ys, radii, alphas, shape_colors
+            )
+        return frame
+    
+    def _get_shape_colors(self, colors, count):
+        """Get the cached float32 (count, 3) color array used by the fused kernels."""
+        key = ('shape_colors', tuple(colors), count)
+        shape_colors = self._background_cache.get(key)
+        if shape_colors is None:
+            shape_colors = np.array([colors[i % len(colors)] for i in range(count)], dtype=np.float32)
+            self._background_cache[key] = shape_colors
+        return shape_colors
+    
+    def _draw_timeline_circles(self, frame, frame_num, timeline, colors):
+        """Rasterize the frame's precomputed circles."""
+        xs = timeline['circle_x'][frame_num]
+        ys = timeline['circle_y'][frame_num]
+        radii = timeline['circle_r'][frame_num]
+        alphas = timeline['circle_alpha'][frame_num]
+        shape_colors = self._get_shape_colors(colors, len(xs))
+        
+        for i in range(len(xs)):
+            self._draw_circle(frame, int(xs[i]), int(ys[i]), int(radii[i]), shape_colors[i], alpha=float(alphas[i]))
+    
+    def _draw_particles(self, frame, frame_num, timeline, colors):
+        """Advance the particle field to this frame and splat it on top."""
+        particles = timeline.get('particles')
+        if particles is None:
+            return
+        particles.update(timeline['particle_clock'][frame_num])
+        particles.splat(
+            frame, particles.get_colors(colors), timeline['particle_gain'][frame_num], backend=self.backend
+        )
+    
+    def _compile_text_overlays(self, total_frames, duration, envelope, title=None, hashtags=None,
+                               output_size=False):
+        """
+        Rasterize the title/hashtag sprites once and compile their per-frame animation.
+        
+        The title bounces and grows on beats; both fade in and out at the clip edges.
+        With output_size, sprites and positions are in output (1080x1920) pixels
+        rather than render pixels.
+        
+        Returns:
+            list: One dict per text block (sprite, x, and per-frame y, scale level
+                  and opacity arrays)
+        """
+        if not (title or hashtags) or total_frames == 0:
+            return []
+        if not text_overlay.PIL_AVAILABLE:
+            print("⚠️  Pillow not installed - skipping text overlays")
+            return []
+        
+        scale = 1.0 if output_size else self.render_scale
+        width, height = (self.width, self.height) if output_size else (self.render_width, self.render_height)
+        t = np.arange(total_frames) / self.render_fps
+        beat = envelope['beat'][np.minimum(np.arange(total_frames), len(envelope['beat']) - 1)]
+        fade = np.clip(np.minimum(t, duration - t) / self.TEXT_FADE_SECONDS, 0, 1)
+        font_path = getattr(settings, 'ANIMATION_FONT_PATH', None)
+        
+        blocks = []
+        if title:
+            blocks.append((title, 64, 0.15, 25, fade))
+        if hashtags:
+            # Hashtags appear a second after the title
+            blocks.append((hashtags, 40, 0.85, 10, fade * np.clip(t - 1.0, 0, 1)))
+        
+        items = []
+        levels = len(self.TEXT_SCALES) - 1
+        for text, font_size, position, bounce, opacity in blocks:
+            sprite = text_overlay.TextSprite(
+                text, font_size * scale, width * 0.85,
+                scales=self.TEXT_SCALES, font_path=font_path
+            )
+            items.append({
+                'sprite': sprite,
+                'x': width // 2,
+                'y': (height * position - bounce * scale * beat).astype(np.int32),
+                'level': np.round(beat * levels).astype(np.int8),
+                'opacity': opacity.astype(np.float32),
+            })
+        return items
+    
+    def _layout_text_sheet(self, items):
+        """
+        Give every output-size text block its own full-width band of a text sheet.
+        
+        A band covers every row the block's sprite touches over the clip (bounce
+        and scale levels included), so blocks never bleed into each other.
+        
+        Args:
+            items (list): Text blocks from _compile_text_overlays(output_size=True)
+            
+        Returns:
+            dict: 'text' (the blocks with y in sheet rows), 'bands' ((output top,
+                  sheet top, height) per block) and the sheet 'height'
+        """
+        text, bands = [], []
+        sheet_height = 0
+        for item in items:
+            heights = [sprite.shape[0] for sprite in item['sprite'].sprites]
+            top = int(item['y'].min()) - max(h // 2 for h in heights)
+            bottom = int(item['y'].max()) + max(h - h // 2 for h in heights)
+            text.append(dict(item, y=(item['y'] - top + sheet_height).astype(np.int32)))
+            bands.append((top, sheet_height, bottom - top))
+            sheet_height += bottom - top
+        return {'text': text, 'bands': bands, 'height': sheet_height}
+    
+    def _draw_text(self, frame, frame_num, timeline):
+        """Composite the frame's text sprites inside their bounding boxes."""
+        for item in timeline.get('text', []):
+            item['sprite'].blend(
+                frame, int(item['level'][frame_num]), item['x'], int(item['y'][frame_num]),
+                float(item['opacity'][frame_num])
+            )
+    
+    def _render_energetic(self, frame, frame_num, timeline, colors):
         """Render energetic animation with particles and pulses - OPTIMIZED."""
-        # Vectorized gradient background
-        y_coords = np.arange(self.height).reshape(-1, 1)
-        ratio = (y_coords / self.height + progress) % 1.0
-        
-        c1 = np.array(colors[0])
-        c2 = np.array(colors[1])
-        # Broadcast ratio correctly for RGB
-        frame[:, :] = (c1 * (1 - ratio[:, :, np.newaxis]) + c2 * ratio[:, :, np.newaxis]).astype(np.uint8)
-        
-        # Add pulsing circles (minimal for speed)
-        num_circles = 2  # Reduced from 3
-        for i in range(num_circles):
-            angle = (i / num_circles) * 2 * np.pi + t * tempo / 60
-            radius = 200 + 100 * np.sin(t * 2 + i)
-            cx = int(self.width / 2 + np.cos(angle) * 300)
-            cy = int(self.height / 2 + np.sin(angle) * 500)
-            
-            color = colors[i % len(colors)]
-            self._draw_circle(frame, cx, cy, int(radius * beat_intensity), color, alpha=0.3)
+        # Gradient scrolls one full height per clip: ratio = (y/h + progress) % 1
+        offset = timeline['background_offset'][frame_num]
+        self._fill_scrolling_gradient(frame, colors[0], colors[1], offset, period=self.render_height)
         
+        # Pulsing circles
+        self._draw_timeline_circles(frame, frame_num, timeline, colors)
         return frame
     
-    def _render_calm(self, frame, t, progress, colors):
+    def _render_calm(self, frame, frame_num, timeline, colors):
         """Render calm animation with gradients and waves - OPTIMIZED."""
-        # Vectorized gradient calculation
-        y_coords = np.arange(self.height).reshape(-1, 1)
-        x_coords = np.arange(self.width).reshape(1, -1)
-        
-        # Wave effect
-        wave = np.sin(x_coords / 200 + t) * 0.5 + 0.5
-        ratio = (y_coords / self.height * 0.7 + wave * 0.3) % 1.0
-        
-        # Blend colors using vectorized operations
-        c1 = np.array(colors[0])
-        c2 = np.array(colors[1])
-        frame[:, :] = (c1 * (1 - ratio[:, :, np.newaxis]) + c2 * ratio[:, :, np.newaxis]).astype(np.uint8)
-        
-        # Gentle particles (minimal for speed)
-        num_particles = 5  # Reduced from 10
-        for i in range(num_particles):
-            x = int((np.sin(t * 0.5 + i) * 0.5 + 0.5) * self.width)
-            y = int(((t * 50 + i * 100) % self.height))
-            color = colors[i % len(colors)]
-            self._draw_circle(frame, x, y, 15, color, alpha=0.5)
+        # Gradient with a horizontal wave: ratio = (0.7 * y/h + 0.3 * wave(x, t)) % 1
+        self._fill_wave_gradient(frame, colors[0], colors[1], timeline['wave_columns'][frame_num])
         
+        # Gentle orbs
+        self._draw_timeline_circles(frame, frame_num, timeline, colors)
         return frame
     
-    def _render_dramatic(self, frame, t, progress, colors, beat_intensity):
+    def _render_dramatic(self, frame, frame_num, timeline, colors):
         """Render dramatic animation with bold contrasts - OPTIMIZED."""
-        # Gradient background (faster than solid + rays)
-        y_coords = np.arange(self.height).reshape(-1, 1)
-        ratio = (y_coords / self.height * 0.5 + progress * 0.5) % 1.0
-        
-        c1 = np.array(colors[0])
-        c2 = np.array(colors[1] if len(colors) > 1 else colors[0])
-        # Broadcast ratio correctly for RGB
-        frame[:, :] = (c1 * (1 - ratio[:, :, np.newaxis]) + c2 * ratio[:, :, np.newaxis]).astype(np.uint8)
-        
-        # Minimal pulsing circles (faster than rays)
-        num_circles = 2
-        for i in range(num_circles):
-            angle = (i / num_circles) * 2 * np.pi + t * 0.5
-            radius = int(150 + 100 * beat_intensity)
-            cx = int(self.width / 2 + np.cos(angle) * 200)
-            cy = int(self.height / 2 + np.sin(angle) * 300)
-            
-            color = colors[i % len(colors)]
-            self._draw_circle(frame, cx, cy, radius, color, alpha=0.4)
+        # Gradient spans two heights and scrolls half a period: ratio = (0.5 * (y/h + progress)) % 1
+        c2 = colors[1] if len(colors) > 1 else colors[0]
+        offset = timeline['background_offset'][frame_num]
+        self._fill_scrolling_gradient(frame, colors[0], c2, offset, period=2 * self.render_height)
         
+        # Pulsing circles
+        self._draw_timeline_circles(frame, frame_num, timeline, colors)
         return frame
     
+    def _get_gradient_table(self, c1, c2, period):
+        """
+        Get a cached uint8 gradient covering one period plus a frame height of rows.
+        
+        Row k holds the c1 -> c2 blend at ratio (k % period) / period, so any
+        scrolled frame is a contiguous slice of the table.
+        
+        Args:
+            c1 (tuple): Start color
+            c2 (tuple): End color
+            period (int): Number of rows in one gradient period
+            
+        Returns:
+            np.ndarray: uint8 table of shape (period + height, width, 3)
+        """
+        key = ('scroll', tuple(c1), tuple(c2), period, self.render_width, self.render_height)
+        table = self._background_cache.get(key)
+        if table is None:
+            rows = np.arange(period + self.render_height)
+            ratio = ((rows % period) / period)[:, np.newaxis]
+            row_colors = (np.array(c1) * (1 - ratio) + np.array(c2) * ratio).astype(np.uint8)
+            # Store full-width rows so a frame is a single contiguous copy
+            table = np.ascontiguousarray(
+                np.broadcast_to(row_colors[:, np.newaxis, :], (len(rows), self.render_width, 3))
+            )
+            self._background_cache[key] = table
+        return table
+    
+    def _fill_scrolling_gradient(self, frame, c1, c2, offset, period):
+        """
+        Fill the frame with a vertically scrolling gradient (a row-offset copy).
+        
+        Args:
+            frame (np.ndarray): uint8 frame, overwritten in place
+            c1 (tuple): Start color
+            c2 (tuple): End color
+            offset (int): Scroll offset in rows (see _scroll_offsets)
+            period (int): Gradient period in rows
+        """
+        table = self._get_gradient_table(c1, c2, period)
+        offset = int(offset) % period
+        np.copyto(frame, table[offset:offset + self.render_height])
+    
+    def _get_wave_tables(self, c1, c2):
+        """
+        Get cached separable terms for the calm wave background.
+        
+        The ratio (0.7 * y/h + 0.3 * wave(x, t)) % 1 is quantized to a
+        power-of-two color lookup table, so each frame only needs an integer
+        add of a row term and a column term followed by a table lookup.
+        
+        Args:
+            c1 (tuple): Start color
+            c2 (tuple): End color
+            
+        Returns:
+            dict: Color LUT and row term (column terms live in the timeline)
+        """
+        key = ('wave', tuple(c1), tuple(c2), self.render_width, self.render_height)
+        tables = self._background_cache.get(key)
+        if tables is None:
+            levels = self.WAVE_LEVELS
+            ratio = (np.arange(levels) / levels)[:, np.newaxis]
+            tables = {
+                'lut': (np.array(c1) * (1 - ratio) + np.array(c2) * ratio).astype(np.uint8),
+                'row_term': np.round(np.arange(self.render_height) / self.render_height * 0.7 * levels)
+                .astype(np.uint16)[:, np.newaxis],
+            }
+            self._background_cache[key] = tables
+        return tables
+    
+    def _fill_wave_gradient(self, frame, c1, c2, col_term):
+        """
+        Fill the frame with the calm wave gradient using precomputed separable terms.
+        
+        Args:
+            frame (np.ndarray): uint8 frame, overwritten in place
+            c1 (tuple): Start color
+            c2 (tuple): End color
+            col_term (np.ndarray): This frame's uint16 column offsets (see _wave_column_terms)
+        """
+        tables = self._get_wave_tables(c1, c2)
+        
+        # Reused index buffer: no per-frame allocation
+        index = self._wave_index
+        np.add(tables['row_term'], col_term, out=index)
+        np.bitwise_and(index, self.WAVE_LEVELS - 1, out=index)
+        np.take(tables['lut'], index, axis=0, out=frame, mode='clip')  # 'clip' writes out unbuffered
+    
+    def _wave_column_terms(self, times):
+        """
+        Per-column LUT offsets of the calm wave for every frame time.
+        
+        Args:
+            times (np.ndarray): Frame times in seconds
+            
+        Returns:
+            np.ndarray: uint16 array of shape (frames, W)
+        """
+        x_phase = np.arange(self.render_width) / (200 * self.render_scale)
+        # sin(x/200 + t) expanded into separable column and time terms
+        wave = (np.sin(x_phase)[np.newaxis, :] * np.cos(times)[:, np.newaxis]
+                + np.cos(x_phase)[np.newaxis, :] * np.sin(times)[:, np.newaxis]) * 0.5 + 0.5
+        return np.round(wave * 0.3 * self.WAVE_LEVELS).astype(np.uint16)
+    
     def _parse_colors(self, color_scheme):
         """Parse color scheme to RGB tuples."""
         colors = []
@@ -432,14 +1658,77 @@ class AnimationGenerator:
         c2 = np.array(color2)
         return (c1 * (1 - ratio) + c2 * ratio).astype(np.uint8)
     
-    def _draw_circle(self, frame, cx, cy, radius, color, alpha=1.0):
-        """Draw a circle on the frame."""
-        y, x = np.ogrid[:self.height, :self.width]
-        mask = (x - cx)**2 + (y - cy)**2 <= radius**2
+    def _get_circle_sprite(self, radius):
+        """
+        Get a cached anti-aliased alpha sprite for a circle.
+        
+        Args:
+            radius (int): Circle radius in pixels
+            
+        Returns:
+            np.ndarray: float32 alpha mask of shape (2r+1, 2r+1) in [0, 1]
+        """
+        sprite = self._sprite_cache.get(radius)
+        if sprite is not None:
+            self._sprite_cache.move_to_end(radius)
+            return sprite
+        
+        offsets = np.arange(-radius, radius + 1, dtype=np.float32)
+        dist = np.sqrt(offsets[:, np.newaxis] ** 2 + offsets[np.newaxis, :] ** 2)
+        # One pixel wide soft edge instead of a hard mask
+        sprite = np.clip(np.float32(radius + 0.5) - dist, 0.0, 1.0)
+        
+        # Evict least recently used sprites to stay within the memory budget
+        self._sprite_cache[radius] = sprite
+        self._sprite_cache_bytes += sprite.nbytes
+        while self._sprite_cache_bytes > self._sprite_cache_limit and len(self._sprite_cache) > 1:
+            _, evicted = self._sprite_cache.popitem(last=False)
+            self._sprite_cache_bytes -= evicted.nbytes
+        return sprite
+    
+    def _blend_sprite(self, frame, sprite, x0, y0, color, alpha=1.0):
+        """
+        Alpha-blend a sprite onto the frame in place, touching only its bounding box.
+        
+        On a premultiplied BGRA layer, pass the color with an alpha of 255: the same
+        blend then writes the sprite's coverage (mask * alpha) into channel 3.
+        
+        Args:
+            frame (np.ndarray): uint8 frame (H, W, 3) or BGRA layer (H, W, 4), modified in place
+            sprite (np.ndarray): float32 alpha mask (h, w)
+            x0 (int): Left edge of the sprite in frame coordinates
+            y0 (int): Top edge of the sprite in frame coordinates
+            color (tuple): Fill color, one value per frame channel
+            alpha (float): Global opacity multiplier
+        """
+        frame_h, frame_w = frame.shape[:2]
+        sprite_h, sprite_w = sprite.shape
+        
+        # Clip the bounding box against the frame
+        fx0, fy0 = max(x0, 0), max(y0, 0)
+        fx1, fy1 = min(x0 + sprite_w, frame_w), min(y0 + sprite_h, frame_h)
+        if fx0 >= fx1 or fy0 >= fy1:
+            return
+        
+        region = frame[fy0:fy1, fx0:fx1]
+        mask = sprite[fy0 - y0:fy1 - y0, fx0 - x0:fx1 - x0]
+        
+        # region + (color - region) * mask * alpha, using the preallocated buffer
+        buf = self._blend_buffer[:fy1 - fy0, :fx1 - fx0, :frame.shape[2]]
+        np.subtract(np.asarray(color, dtype=np.float32), region, out=buf)
+        buf *= mask[:, :, np.newaxis]
         if alpha < 1.0:
-            frame[mask] = (frame[mask] * (1 - alpha) + np.array(color) * alpha).astype(np.uint8)
-        else:
-            frame[mask] = color
+            buf *= np.float32(alpha)
+        buf += region
+        np.copyto(region, buf, casting='unsafe')
+    
+    def _draw_circle(self, frame, cx, cy, radius, color, alpha=1.0):
+        """Draw an anti-aliased circle on the frame (bounding box only)."""
+        radius = int(radius)
+        if radius <= 0:
+            return
+        sprite = self._get_circle_sprite(radius)
+        self._blend_sprite(frame, sprite, cx - radius, cy - radius, color, alpha)
     
     def _draw_line(self, frame, x1, y1, x2, y2, color, alpha=1.0, thickness=5):
         """Draw a line on the frame."""
@@ -452,10 +1741,66 @@ class AnimationGenerator:
             t = i / length
             x = int(x1 + (x2 - x1) * t)
             y = int(y1 + (y2 - y1) * t)
-            if 0 <= x < self.width and 0 <= y < self.height:
+            if 0 <= x < self.render_width and 0 <= y < self.render_height:
                 self._draw_circle(frame, x, y, thickness, color, alpha)
 
 
+class _FFmpegFrameWriter:
+    """Encoder that streams raw frames to an FFmpeg process over stdin."""
+    
+    def __init__(self, cmd):
+        self.cmd = cmd
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+    
+    def write(self, frame):
+        """Write one contiguous uint8 frame."""
+        self.process.stdin.write(frame.data)
+    
+    def close(self):
+        """Finish the stream and wait for FFmpeg to finalize the file."""
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = self.process.stderr.read()
+        self.process.stderr.close()
+        if self.process.wait() != 0:
+            raise subprocess.CalledProcessError(
+                self.process.returncode, self.cmd, stderr=stderr.decode(errors='replace')
+            )
+
+
+# Per-process state for parallel render workers
+_worker_state = {}
+
+
+def _init_render_worker(ring_name, slots, frame_shape, render_args, config):
+    """Attach a render worker to the shared frame ring."""
+    ring_memory = shared_memory.SharedMemory(name=ring_name)
+    _worker_state['ring_memory'] = ring_memory  # Keep the mapping alive
+    _worker_state['ring'] = np.ndarray((slots,) + frame_shape, dtype=np.uint8, buffer=ring_memory.buf)
+    _worker_state['slots'] = slots
+    _worker_state['render_args'] = render_args
+    _worker_state['generator'] = AnimationGenerator(enable_ai=False, render_workers=1, **config)
+
+
+def _render_frame_range(start, end):
+    """Render frames [start, end) into their ring slots."""
+    generator = _worker_state['generator']
+    ring = _worker_state['ring']
+    slots = _worker_state['slots']
+    render_args = _worker_state['render_args']
+    
+    for frame_num in range(start, end):
+        generator._render_frame_bgr(frame_num, render_args, ring[frame_num % slots])
+    return end - start
+
+
 # Example usage
 if __name__ == "__main__":
     generator = AnimationGenerator()
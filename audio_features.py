@@ -0,0 +1,274 @@
+"""
+Streaming Audio Feature Extraction
+Decodes audio through an FFmpeg pipe and computes frame-level features incrementally,
+so memory stays flat no matter how long the input is.
+"""
+
+import shutil
+import subprocess
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def ffmpeg_available():
+    """Check whether an ffmpeg binary is on the PATH."""
+    return shutil.which('ffmpeg') is not None
+
+
+def stream_pcm(source, sample_rate, duration=None, start=None, chunk_samples=65536):
+    """
+    Decode audio to mono float32 PCM through FFmpeg and yield it in chunks.
+
+    Args:
+        source (str): Audio/video file path or URL
+        sample_rate (int): Output sample rate (FFmpeg resamples natively)
+        duration (float): Maximum seconds to decode (None = all)
+        start (float): Seek offset in seconds (None = from the beginning)
+        chunk_samples (int): Samples per yielded chunk
+
+    Yields:
+        np.ndarray: float32 chunks of at most chunk_samples samples
+    """
+    cmd = ['ffmpeg', '-nostdin', '-loglevel', 'error']
+    if start:
+        cmd += ['-ss', str(start)]
+    cmd += ['-i', str(source)]
+    if duration:
+        cmd += ['-t', str(duration)]
+    # Decode as stereo and average in NumPy: FFmpeg's own mono downmix adds a
+    # +3 dB center gain, which would skew energy compared to librosa.load
+    cmd += ['-vn', '-ac', '2', '-ar', str(sample_rate), '-f', 'f32le', '-']
+
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    frame_bytes = 8  # Two float32 channels
+    chunk_bytes = chunk_samples * frame_bytes
+    pending = b''
+    try:
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            data = pending + data
+            usable = len(data) - len(data) % frame_bytes
+            pending = data[usable:]
+            if usable:
+                stereo = np.frombuffer(data[:usable], dtype=np.float32).reshape(-1, 2)
+                yield stereo.mean(axis=1, dtype=np.float32)
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"FFmpeg audio decode failed: {stderr.decode(errors='replace').strip()}")
+
+
+def mel_filterbank(sample_rate, n_fft, n_mels=128):
+    """
+    Build a Slaney-style mel filterbank (same defaults as librosa.filters.mel).
+
+    Args:
+        sample_rate (int): Sample rate
+        n_fft (int): FFT size
+        n_mels (int): Number of mel bands
+
+    Returns:
+        np.ndarray: float32 weights of shape (n_mels, n_fft // 2 + 1)
+    """
+    def hz_to_mel(hz):
+        hz = np.asarray(hz, dtype=np.float64)
+        linear = hz / (200.0 / 3)
+        log_region = hz >= 1000.0
+        return np.where(log_region, 15.0 + np.log(np.maximum(hz, 1e-10) / 1000.0) / (np.log(6.4) / 27.0), linear)
+
+    def mel_to_hz(mel):
+        mel = np.asarray(mel, dtype=np.float64)
+        linear = mel * (200.0 / 3)
+        log_region = mel >= 15.0
+        return np.where(log_region, 1000.0 * np.exp((np.log(6.4) / 27.0) * (mel - 15.0)), linear)
+
+    fft_freqs = np.fft.rfftfreq(n_fft, d=1.0 / sample_rate)
+    mel_freqs = mel_to_hz(np.linspace(hz_to_mel(0.0), hz_to_mel(sample_rate / 2.0), n_mels + 2))
+
+    # Triangular filters, area-normalized
+    fdiff = np.diff(mel_freqs)
+    ramps = mel_freqs[:, np.newaxis] - fft_freqs[np.newaxis, :]
+    lower = -ramps[:-2] / fdiff[:-1, np.newaxis]
+    upper = ramps[2:] / fdiff[1:, np.newaxis]
+    weights = np.maximum(0, np.minimum(lower, upper))
+    weights *= (2.0 / (mel_freqs[2:] - mel_freqs[:-2]))[:, np.newaxis]
+    return weights.astype(np.float32)
+
+
+def chroma_filterbank(sample_rate, n_fft, min_hz=55.0, max_hz=5000.0):
+    """
+    Map FFT bins to the 12 pitch classes (C, C#, ..., B).
+
+    Args:
+        sample_rate (int): Sample rate
+        n_fft (int): FFT size
+        min_hz (float): Lowest frequency counted (lower bins are too coarse to resolve pitch)
+        max_hz (float): Highest frequency counted
+
+    Returns:
+        np.ndarray: float32 0/1 weights of shape (12, n_fft // 2 + 1)
+    """
+    fft_freqs = np.fft.rfftfreq(n_fft, d=1.0 / sample_rate)
+    usable = (fft_freqs >= min_hz) & (fft_freqs <= max_hz)
+    # Semitones above C: A4 = 440 Hz is pitch class 9
+    pitch_class = np.round(12 * np.log2(np.maximum(fft_freqs, 1e-10) / 440.0) + 9).astype(np.int64) % 12
+    weights = np.zeros((12, len(fft_freqs)), dtype=np.float32)
+    weights[pitch_class[usable], np.flatnonzero(usable)] = 1.0
+    return weights
+
+
+class StreamingFeatureExtractor:
+    """
+    Incremental STFT feature extractor.
+
+    Frames are centered like librosa (n_fft // 2 zero padding at both ends), so
+    feature frame i sits at i * hop_length / sample_rate seconds and RMS matches
+    librosa.feature.rms. Onset strength follows librosa.onset.onset_strength
+    (rectified flux of the log-power mel spectrogram). Every feature, including
+    the bass/mid/treble band energies and linear spectral flux, is derived from
+    the same single STFT, as is the optional 12-bin chroma. Only the unconsumed tail of the signal and the previous
+    spectrum are kept between chunks.
+    """
+
+    # Frequency bands (Hz) for the per-frame band energies
+    BANDS = {
+        'bass': (20.0, 250.0),
+        'mid': (250.0, 4000.0),
+        'treble': (4000.0, None),
+    }
+
+    def __init__(self, sample_rate, n_fft=2048, hop_length=512, chroma=False):
+        """
+        Initialize the extractor.
+
+        Args:
+            sample_rate (int): Sample rate of the fed PCM
+            n_fft (int): FFT window size
+            hop_length (int): Samples between feature frames
+            chroma (bool): Also compute per-frame chroma (pitch-class energy)
+        """
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.window = np.hanning(n_fft + 1)[:-1].astype(np.float32)  # Periodic Hann
+        self.frequencies = np.fft.rfftfreq(n_fft, d=1.0 / sample_rate).astype(np.float32)
+        self.mel_basis = mel_filterbank(sample_rate, n_fft)
+        self.band_slices = {}
+        for name, (low, high) in self.BANDS.items():
+            high = sample_rate / 2.0 if high is None else high
+            bins = np.flatnonzero((self.frequencies >= low) & (self.frequencies < high))
+            self.band_slices[name] = slice(bins[0], bins[-1] + 1)
+
+        self.total_samples = 0
+        self._carry = np.zeros(n_fft // 2, dtype=np.float32)
+        self._previous_log_mel = None
+        self._previous_spectrum = None
+        self._features = {name: [] for name in ('rms', 'centroid', 'onset', 'flux') + tuple(self.BANDS)}
+        self.chroma_basis = None
+        if chroma:
+            self.chroma_basis = chroma_filterbank(sample_rate, n_fft)
+            self._features['chroma'] = []
+
+    def feed(self, samples):
+        """Consume a chunk of mono float32 samples."""
+        self.total_samples += len(samples)
+        self._process(np.concatenate([self._carry, samples]))
+
+    def finish(self):
+        """
+        Flush the remaining samples and return the per-frame features.
+
+        Returns:
+            dict: float32 arrays 'rms', 'centroid', 'onset' (mel spectral flux),
+                  'flux' (linear spectral flux) and 'bass'/'mid'/'treble' band
+                  energies, 'chroma' of shape (frames, 12) if requested, plus
+                  'times' (seconds per frame) and 'duration' in seconds
+        """
+        self._process(np.concatenate([self._carry, np.zeros(self.n_fft // 2, dtype=np.float32)]))
+
+        # librosa's centered frame count: 1 + len(y) // hop_length
+        frame_count = 1 + self.total_samples // self.hop_length
+        features = {
+            name: np.concatenate(values)[:frame_count] if values else np.zeros(0, dtype=np.float32)
+            for name, values in self._features.items()
+        }
+
+        # librosa delays the onset envelope by n_fft // (2 * hop) frames when centering
+        delay = self.n_fft // (2 * self.hop_length)
+        onset = features['onset']
+        features['onset'] = np.concatenate([np.zeros(delay, dtype=np.float32), onset])[:len(onset)]
+        features['times'] = np.arange(len(features['rms'])) * self.hop_length / self.sample_rate
+        features['duration'] = self.total_samples / self.sample_rate
+        return features
+
+    def _process(self, signal):
+        """Compute features for every complete frame in signal and keep the tail."""
+        if len(signal) < self.n_fft:
+            self._carry = signal
+            return
+
+        frame_count = 1 + (len(signal) - self.n_fft) // self.hop_length
+        frames = sliding_window_view(signal, self.n_fft)[::self.hop_length][:frame_count]
+        self._carry = signal[frame_count * self.hop_length:]
+
+        spectrum = np.abs(np.fft.rfft(frames * self.window, axis=1)).astype(np.float32)
+        self._compute_features(frames, spectrum)
+
+    def _compute_features(self, frames, spectrum):
+        """Derive per-frame features from a batch of frames and their magnitude spectra."""
+        self._features['rms'].append(np.sqrt(np.mean(frames ** 2, axis=1)).astype(np.float32))
+
+        total = spectrum.sum(axis=1)
+        centroid = (spectrum @ self.frequencies) / np.maximum(total, 1e-10)
+        self._features['centroid'].append(centroid.astype(np.float32))
+
+        # Onset strength: half-wave rectified flux of the log-power mel spectrogram
+        mel = (spectrum ** 2) @ self.mel_basis.T
+        log_mel = 10.0 * np.log10(np.maximum(mel, 1e-10))
+        previous = log_mel[:1] if self._previous_log_mel is None else self._previous_log_mel
+        flux = np.diff(np.concatenate([previous, log_mel]), axis=0)
+        self._features['onset'].append(np.maximum(flux, 0).mean(axis=1).astype(np.float32))
+        self._previous_log_mel = log_mel[-1:]
+
+        # Linear-magnitude spectral flux
+        previous = spectrum[:1] if self._previous_spectrum is None else self._previous_spectrum
+        flux = np.diff(np.concatenate([previous, spectrum]), axis=0)
+        self._features['flux'].append(np.maximum(flux, 0).sum(axis=1).astype(np.float32))
+        self._previous_spectrum = spectrum[-1:]
+
+        # Band energies: RMS magnitude of each band's bins
+        power = spectrum ** 2
+        for name, bins in self.band_slices.items():
+            self._features[name].append(np.sqrt(power[:, bins].mean(axis=1)).astype(np.float32))
+
+        if self.chroma_basis is not None:
+            self._features['chroma'].append((power @ self.chroma_basis.T).astype(np.float32))
+
+
+def extract_streaming_features(source, sample_rate, duration=None, start=None, n_fft=2048, hop_length=512,
+                               chroma=False):
+    """
+    Decode audio through FFmpeg and extract features in a single streaming pass.
+
+    Args:
+        source (str): Audio/video file path or URL
+        sample_rate (int): Analysis sample rate
+        duration (float): Maximum seconds to analyze
+        start (float): Seek offset in seconds
+        n_fft (int): FFT window size
+        hop_length (int): Samples between feature frames
+        chroma (bool): Also compute per-frame chroma
+
+    Returns:
+        dict: Features from StreamingFeatureExtractor.finish()
+    """
+    extractor = StreamingFeatureExtractor(sample_rate, n_fft=n_fft, hop_length=hop_length, chroma=chroma)
+    for chunk in stream_pcm(source, sample_rate, duration=duration, start=start):
+        extractor.feed(chunk)
+    return extractor.finish()
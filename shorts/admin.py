@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import VideoShort
+from .models import VideoShort, VideoAnalysis
 
 @admin.register(VideoShort)
 class VideoShortAdmin(admin.ModelAdmin):
@@ -7,3 +7,11 @@ class VideoShortAdmin(admin.ModelAdmin):
     list_filter = ('uploaded_to_youtube', 'created_at')
     search_fields = ('original_title', 'youtube_video_id')
     readonly_fields = ('created_at',)
+
+
+@admin.register(VideoAnalysis)
+class VideoAnalysisAdmin(admin.ModelAdmin):
+    list_display = ('video_id', 'analyzer_version', 'updated_at')
+    list_filter = ('analyzer_version',)
+    search_fields = ('video_id', 'youtube_url')
+    readonly_fields = ('created_at', 'updated_at')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from animation_generator import AnimationGenerator
+
+
+class Command(BaseCommand):
+    """Fill the animation visual style cache for every tempo/energy bucket."""
+    
+    help = 'Pre-generate AI visual styles for every mood/tempo/energy bucket'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate styles that are already cached'
+        )
+    
+    def handle(self, *args, **options):
+        generator = AnimationGenerator(render_workers=1)
+        result = generator.prewarm_style_cache(force=options['force'])
+        
+        if 'error' in result:
+            raise CommandError(result['error'])
+        
+        summary = (
+            f"{result['generated']} generated, {result['cached']} already cached, "
+            f"{result['failed']} failed"
+        )
+        if result['success']:
+            self.stdout.write(self.style.SUCCESS(f"✅ Style cache ready: {summary}"))
+        else:
+            self.stdout.write(self.style.WARNING(f"⚠️  Style cache incomplete: {summary}"))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shorts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('video_id', models.CharField(max_length=100)),
+                ('analyzer_version', models.PositiveIntegerField()),
+                ('youtube_url', models.URLField(max_length=500)),
+                ('heatmap', models.BinaryField(blank=True, default=b'')),
+                ('video_info', models.JSONField(default=dict)),
+                ('suggested_segment', models.JSONField(default=dict)),
+                ('candidate_segments', models.JSONField(default=list)),
+                ('ai_analysis', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='videoanalysis',
+            constraint=models.UniqueConstraint(fields=('video_id', 'analyzer_version'), name='unique_video_analysis'),
+        ),
+    ]
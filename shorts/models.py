@@ -1,4 +1,8 @@
+from datetime import timedelta
+
+import numpy as np
 from django.db import models
+from django.utils import timezone
 
 
 class VideoShort(models.Model):
@@ -25,3 +29,47 @@ class VideoShort(models.Model):
     
     def __str__(self):
         return f"{self.original_title} ({self.start_time} - {self.end_time})"
+
+
+class VideoAnalysis(models.Model):
+    """Cached VideoAnalyzer results for one video and analyzer version."""
+    
+    video_id = models.CharField(max_length=100)
+    analyzer_version = models.PositiveIntegerField()
+    youtube_url = models.URLField(max_length=500)
+    
+    # Raw heatmap as float32 (start_time, end_time, value) triples
+    heatmap = models.BinaryField(blank=True, default=b'')
+    video_info = models.JSONField(default=dict)
+    suggested_segment = models.JSONField(default=dict)
+    candidate_segments = models.JSONField(default=list)
+    ai_analysis = models.JSONField(default=dict)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-updated_at']
+        constraints = [
+            models.UniqueConstraint(fields=['video_id', 'analyzer_version'], name='unique_video_analysis'),
+        ]
+    
+    def __str__(self):
+        return f"{self.video_info.get('title', self.video_id)} (analyzer v{self.analyzer_version})"
+    
+    def set_heatmap(self, heatmap):
+        """Pack yt-dlp heatmap buckets into the compact binary field."""
+        triples = [(p.get('start_time', 0), p.get('end_time', 0), p.get('value', 0)) for p in heatmap or []]
+        self.heatmap = np.asarray(triples, dtype=np.float32).tobytes()
+    
+    def get_heatmap(self):
+        """Unpack the heatmap into yt-dlp's bucket format."""
+        triples = np.frombuffer(bytes(self.heatmap), dtype=np.float32).reshape(-1, 3)
+        return [
+            {'start_time': float(start), 'end_time': float(end), 'value': float(value)}
+            for start, end, value in triples
+        ]
+    
+    def is_expired(self, ttl_seconds):
+        """Whether the analysis is older than ttl_seconds."""
+        return timezone.now() - self.updated_at > timedelta(seconds=ttl_seconds)
@@ -1,3 +1,45 @@
-from django.test import TestCase
+import subprocess
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from video_processor import VideoProcessor
+
+
+class TrimDeadAirTests(SimpleTestCase):
+    """trim_dead_air against canned silencedetect/blackdetect output."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.processor = VideoProcessor(download_dir=f"{tmp.name}/dl", output_dir=f"{tmp.name}/out")
+
+    def trim(self, stderr, start=100, end=140):
+        result = subprocess.CompletedProcess(args=[], returncode=0, stdout='', stderr=stderr)
+        with mock.patch('video_processor.subprocess.run', return_value=result):
+            return self.processor.trim_dead_air('clip.mp4', start, end)
+
+    def test_dead_head_only(self):
+        stderr = (
+            '[silencedetect @ 0x1] silence_start: 0\n'
+            '[silencedetect @ 0x1] silence_end: 1.2 | silence_duration: 1.2\n'
+        )
+        self.assertEqual(self.trim(stderr), (101.1, 140))
+
+    def test_dead_tail_only(self):
+        stderr = '[blackdetect @ 0x1] black_start:3.5 black_end:5 black_duration:1.5\n'
+        self.assertEqual(self.trim(stderr), (100, 138.6))
+
+    def test_both_edges_dead(self):
+        # Silence runs across the head/tail join and never ends
+        stderr = '[silencedetect @ 0x1] silence_start: 0\n'
+        self.assertEqual(self.trim(stderr), (102.4, 137.6))
+
+    def test_fully_dead_clip(self):
+        # Both windows together cover the whole 5s clip
+        stderr = '[blackdetect @ 0x1] black_start:0 black_end:5 black_duration:5\n'
+        self.assertEqual(self.trim(stderr, start=10, end=15), (10, 15))
+
+    def test_nothing_dead(self):
+        self.assertEqual(self.trim(''), (100, 140))
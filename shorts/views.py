@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.conf import settings
 from django.core.files import File
+from django.core.files.storage import default_storage
 from django.http import JsonResponse
 from .models import VideoShort
 from video_processor import VideoProcessor
@@ -11,7 +12,6 @@ from ai_error_handler import handle_error, get_error_message
 import os
 import sys
 from pathlib import Path
-from moviepy.editor import VideoFileClip, AudioFileClip
 
 # Add parent directory to path to import modules
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -94,10 +94,14 @@ def index(request):
 #     except Exception as e:
 #         handle_error(e, context="Animated short creation", show_traceback=True)
 #         raise
-def _create_animated_short(processor, youtube_url, start_time, end_time):
+def _create_animated_short(processor, youtube_url, start_time, end_time, visual_style=None,
+                           title=None, hashtags=None):
     """
-    Create an animated short by cutting the required portion of the video
-    instead of extracting audio separately.
+    Create an animated short: the selected segment reframed to vertical with an
+    audio-reactive effects layer composited on top in a single FFmpeg encode.
+    Falls back to FFmpeg's cut + reframe (crop_video) if the overlay fails.
+    visual_style reuses a style the user approved from a preview; title and
+    hashtags are drawn as animated text overlays.
     """
     try:
         # Download video
@@ -114,31 +118,49 @@ def _create_animated_short(processor, youtube_url, start_time, end_time):
             print(f"⚠️  Segment too long ({duration}s). Limiting to 45 seconds.")
             end_seconds = start_seconds + 45
 
-        # Cut only the selected segment (audio + video)
-        print(f"✂️ Cutting clip from {start_seconds}s to {end_seconds}s ...")
-        clip = VideoFileClip(video_path).subclip(start_seconds, end_seconds)
+        # Don't spend Shorts runtime on silence or black frames at the edges
+        start_seconds, end_seconds = processor.trim_dead_air(video_path, start_seconds, end_seconds)
 
         # Define output path
         output_filename = f'animated_short_{VideoShort.objects.count() + 1}.mp4'
         output_path = str(processor.output_dir / output_filename)
 
-        # Save the cut video (keep audio)
-        clip.write_videofile(
-            output_path,
-            codec="libx264",
-            audio_codec="aac",
-            temp_audiofile=str(processor.output_dir / "temp_cut_audio.m4a"),
-            remove_temp=True,
-            verbose=False,
-            logger=None
+        # Render the effects layer and composite it over the reframed segment
+        print("🎨 Generating audio-reactive overlay...")
+        generator = AnimationGenerator()
+        animation_result = generator.create_overlay_short(
+            video_path=video_path,
+            output_path=output_path,
+            start=start_seconds,
+            duration=end_seconds - start_seconds,
+            base_filter=VideoProcessor.SHORTS_FILTER,
+            visual_style=visual_style,
+            title=title,
+            hashtags=hashtags
         )
 
-        clip.close()
+        if animation_result['success']:
+            return {
+                'output_path': output_path,
+                'original_title': video_info['title'],
+                'video_id': video_info['id'],
+                'duration': end_seconds - start_seconds,
+                'is_animation': True,
+                'animation_style': animation_result.get('style', {})
+            }
+
+        print(f"⚠️  Overlay failed, creating a plain clip instead: {animation_result.get('error')}")
 
-        # (Optional) Run animation overlay — if you want to add visual motion graphics later
-        # If your AnimationGenerator adds overlays, you can re-enable this:
-        # generator = AnimationGenerator()
-        # animation_result = generator.overlay_animation(output_path)
+        # Cut and reframe the segment with FFmpeg (no frames pass through Python)
+        print(f"✂️ Cutting clip from {start_seconds}s to {end_seconds}s ...")
+        output_path = processor.crop_video(
+            video_path,
+            start_seconds,
+            end_seconds,
+            output_filename=output_filename,
+            make_shorts_format=True,
+            trim_edges=False  # Already trimmed above
+        )
 
         print("✅ Clip created successfully.")
 
@@ -287,6 +309,7 @@ def generate_short(request):
         end_time = request.POST.get('end_time')
         auto_detect = request.POST.get('auto_detect', 'off') == 'on'
         create_animation = request.POST.get('create_animation', 'off') == 'on'
+        seamless_loop = request.POST.get('seamless_loop', 'off') == 'on'
         
         if not youtube_url:
             messages.error(request, 'Please provide a YouTube URL.')
@@ -336,8 +359,18 @@ def generate_short(request):
             # Animation mode
             if create_animation:
                 print(f"\n🎨 Animation Mode: Creating audio-reactive animation")
+                # Reuse the style approved from a preview of this video
+                approved = request.session.pop('animation_preview', None)
+                visual_style = approved['style'] if approved and approved['youtube_url'] == youtube_url else None
+                # Show the AI title and hashtags on the short itself when we have them
+                title = hashtags = None
+                if ai_metadata:
+                    title = ai_metadata.get('title')
+                    tags = ['#' + tag.strip().lstrip('#').replace(' ', '') for tag in ai_metadata.get('tags') or []]
+                    hashtags = ' '.join([tag for tag in tags if len(tag) > 1][:3]) or None
                 result = _create_animated_short(
-                    processor, youtube_url, start_time, end_time
+                    processor, youtube_url, start_time, end_time, visual_style=visual_style,
+                    title=title, hashtags=hashtags
                 )
             else:
                 print(f"\n🎬 Processing video: {youtube_url}")
@@ -346,7 +379,8 @@ def generate_short(request):
                     start_time=start_time,
                     end_time=end_time,
                     output_filename=f'short_{VideoShort.objects.count() + 1}.mp4',
-                    make_shorts_format=True
+                    make_shorts_format=True,
+                    seamless_loop=seamless_loop
                 )
             
             # Create DB record
@@ -400,6 +434,68 @@ def generate_short(request):
     return redirect('shorts:index')
 
 
+def preview_animation(request):
+    """Render a quick low-resolution slice of the animated short so the style can be approved."""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
+    
+    youtube_url = request.POST.get('youtube_url')
+    start_time = request.POST.get('start_time')
+    end_time = request.POST.get('end_time')
+    auto_detect = request.POST.get('auto_detect', 'off') == 'on'
+    if not youtube_url:
+        return JsonResponse({'success': False, 'error': 'Please provide a YouTube URL.'}, status=400)
+    
+    try:
+        processor = VideoProcessor(
+            download_dir=str(settings.DOWNLOADS_DIR),
+            output_dir=str(settings.OUTPUTS_DIR)
+        )
+        video_path, video_info = processor.download_video(youtube_url)
+        
+        if auto_detect or not (start_time and end_time):
+            # No times yet: the stored AI suggestion if the video was analyzed, else its opening
+            segment = VideoAnalyzer().get_stored_segment(video_info['id'])
+            if segment:
+                start_time, end_time = segment['start_time'], segment['end_time']
+            else:
+                start_time, end_time = 0, video_info.get('duration') or 45
+        
+        start_seconds = processor.parse_time(start_time)
+        end_seconds = min(processor.parse_time(end_time), start_seconds + 45)
+        # Same trimmed segment as the final render, so its audio analysis is reused
+        start_seconds, end_seconds = processor.trim_dead_air(video_path, start_seconds, end_seconds)
+        
+        preview_name = f"previews/preview_{video_info['id']}_{start_seconds}.mp4"
+        preview_path = Path(default_storage.path(preview_name))
+        preview_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        generator = AnimationGenerator()
+        result = generator.create_overlay_short(
+            video_path=video_path,
+            output_path=str(preview_path),
+            start=start_seconds,
+            duration=end_seconds - start_seconds,
+            base_filter=VideoProcessor.SHORTS_FILTER,
+            preview=True
+        )
+        if not result['success']:
+            return JsonResponse({'success': False, 'error': result['error']}, status=500)
+        
+        # Remembered until the user generates the full short from this video
+        request.session['animation_preview'] = {'youtube_url': youtube_url, 'style': result['style']}
+        
+        return JsonResponse({
+            'success': True,
+            'preview_url': default_storage.url(preview_name),
+            'style': result['style']
+        })
+    
+    except Exception as e:
+        handle_error(e, context="Animation preview", show_traceback=True)
+        return JsonResponse({'success': False, 'error': get_error_message(e, context="Animation preview")}, status=500)
+
+
 def upload_to_youtube(request, short_id):
     """Handle YouTube upload with OAuth 2.0."""
     video_short = get_object_or_404(VideoShort, id=short_id)
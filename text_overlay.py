@@ -0,0 +1,159 @@
+"""
+Text Overlays
+Title and hashtag sprites for AnimationGenerator.
+
+Text is rasterized once with Pillow into premultiplied BGRA sprites (one per
+scale level), so drawing it on a frame is a bounding-box blend of a cached
+sprite. Animation only picks a scale level, a position and an opacity per frame.
+"""
+
+import numpy as np
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+class TextSprite:
+    """A block of wrapped text pre-rendered at a few scales."""
+
+    def __init__(self, text, font_size, max_width, fill=(255, 255, 255), stroke=(0, 0, 0),
+                 scales=(1.0,), font_path=None):
+        """
+        Rasterize the text.
+
+        Args:
+            text (str): Text to render (wrapped to max_width)
+            font_size (int): Font size in pixels at scale 1.0
+            max_width (int): Maximum line width in pixels at scale 1.0
+            fill (tuple): Text color in the frame's channel order
+            stroke (tuple): Outline color in the frame's channel order
+            scales (tuple): Scale levels to pre-render
+            font_path (str): TrueType font file (None = DejaVu Sans Bold or Pillow's default)
+        """
+        if not PIL_AVAILABLE:
+            raise ImportError("Pillow is required for text overlays. Run: pip install Pillow")
+
+        self.text = text
+        self.scales = tuple(scales)
+        self.sprites = [
+            self._rasterize(text, max(int(round(font_size * scale)), 1), max_width * scale, fill, stroke, font_path)
+            for scale in self.scales
+        ]
+
+    def blend(self, frame, level, cx, cy, opacity=1.0):
+        """
+        Composite one scale level centered on (cx, cy), touching only its bounding box.
+
+        Args:
+            frame (np.ndarray): uint8 frame (H, W, 3) or premultiplied layer (H, W, 4)
+            level (int): Index into scales
+            cx, cy (int): Sprite center in frame pixels
+            opacity (float): Overall opacity (0-1)
+        """
+        if opacity <= 0:
+            return
+        clipped = self._clip(frame, level, cx, cy)
+        if clipped is None:
+            return
+        region, source = clipped
+
+        source = source.astype(np.float32) * np.float32(opacity / 255.0)
+        keep = 1.0 - source[:, :, 3:4]
+
+        # Premultiplied "over": color = source + destination * (1 - source alpha)
+        region[:, :, :3] = (source[:, :, :3] * 255.0 + region[:, :, :3] * keep).astype(np.uint8)
+        if frame.shape[2] == 4:
+            region[:, :, 3] = (source[:, :, 3] * 255.0 + region[:, :, 3] * keep[:, :, 0]).astype(np.uint8)
+
+    def stamp(self, layer, level, cx, cy, opacity=1.0):
+        """
+        Write one scale level centered on (cx, cy) into a fully transparent layer.
+
+        Same result as blend() onto an all-zero premultiplied layer, without
+        reading the destination: a plain copy at full opacity.
+
+        Args:
+            layer (np.ndarray): All-zero premultiplied layer (H, W, 4)
+            level (int): Index into scales
+            cx, cy (int): Sprite center in layer pixels
+            opacity (float): Overall opacity (0-1)
+        """
+        if opacity <= 0:
+            return
+        clipped = self._clip(layer, level, cx, cy)
+        if clipped is None:
+            return
+        region, source = clipped
+        if opacity >= 1:
+            region[:] = source
+        else:
+            np.multiply(source, np.float32(opacity), out=region, casting='unsafe')
+
+    def _clip(self, frame, level, cx, cy):
+        """The frame region a centered sprite covers and the matching part of the sprite (None if off-frame)."""
+        sprite = self.sprites[level]
+        height, width = sprite.shape[:2]
+        x0 = int(cx) - width // 2
+        y0 = int(cy) - height // 2
+
+        # Clip the sprite rectangle to the frame
+        fx0, fy0 = max(x0, 0), max(y0, 0)
+        fx1, fy1 = min(x0 + width, frame.shape[1]), min(y0 + height, frame.shape[0])
+        if fx0 >= fx1 or fy0 >= fy1:
+            return None
+        return frame[fy0:fy1, fx0:fx1], sprite[fy0 - y0:fy1 - y0, fx0 - x0:fx1 - x0]
+
+    def _rasterize(self, text, font_size, max_width, fill, stroke, font_path):
+        """Render the text to a premultiplied BGRA uint8 array."""
+        font = self._load_font(font_size, font_path)
+        stroke_width = max(font_size // 12, 1)
+        lines = self._wrap(text, font, max_width)
+
+        ascent, descent = font.getmetrics()
+        line_height = ascent + descent + stroke_width * 2
+        line_widths = [int(font.getlength(line)) + stroke_width * 2 for line in lines]
+        width = max(line_widths + [1])
+        height = max(line_height * len(lines), 1)
+
+        # Pillow draws RGBA; the colors are passed through in the frame's channel order
+        image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        for i, line in enumerate(lines):
+            draw.text(
+                ((width - line_widths[i]) // 2 + stroke_width, i * line_height + stroke_width),
+                line, font=font, fill=tuple(fill) + (255,),
+                stroke_width=stroke_width, stroke_fill=tuple(stroke) + (255,)
+            )
+
+        sprite = np.asarray(image, dtype=np.uint16)
+        alpha = sprite[:, :, 3:4]
+        sprite[:, :, :3] = sprite[:, :, :3] * alpha // 255  # Premultiply
+        return sprite.astype(np.uint8)
+
+    def _load_font(self, font_size, font_path):
+        """Load the requested font, falling back to DejaVu Sans Bold, then Pillow's default."""
+        for path in (font_path, 'DejaVuSans-Bold.ttf'):
+            if path:
+                try:
+                    return ImageFont.truetype(path, font_size)
+                except OSError:
+                    pass
+        return ImageFont.load_default(size=font_size)
+
+    def _wrap(self, text, font, max_width):
+        """Greedy word wrap to max_width pixels."""
+        lines = []
+        for paragraph in text.splitlines() or ['']:
+            line = ''
+            for word in paragraph.split():
+                candidate = f"{line} {word}".strip()
+                if line and font.getlength(candidate) > max_width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return lines
@@ -5,32 +5,110 @@ Detects the most engaging/replayed segments of YouTube videos using Gemini AI.
 
 import google.generativeai as genai
 from django.conf import settings
+from django.db import DatabaseError
 import yt_dlp
+from yt_dlp.extractor.youtube import YoutubeIE
 import json
+import shutil
+import subprocess
+import numpy as np
 from pathlib import Path
+import audio_features
 from ai_error_handler import handle_error, get_error_message
 
 
 class VideoAnalyzer:
     """Analyze YouTube videos to find the best segments for Shorts."""
     
+    # Bump whenever segment scoring changes, so stored analyses are recomputed
+    ANALYZER_VERSION = 2
+    
+    # video_info keys that are not stored: bulky, or signed URLs that expire
+    TRANSIENT_INFO_KEYS = ('heatmap', 'captions', 'preview_stream_url', 'audio_stream_url')
+    
+    # Candidate clip lengths (seconds) and how many clips to suggest per video
+    MIN_SEGMENT_SECONDS = 15
+    MAX_SEGMENT_SECONDS = 60
+    TOP_K_SEGMENTS = 5
+    
+    # Scene-cut snapping: decode +/- SNAP_RADIUS seconds around each boundary as tiny
+    # grayscale frames and move the boundary to the nearest hard cut
+    SNAP_RADIUS_SECONDS = 3
+    SNAP_FPS = 10
+    SNAP_FRAME_SIZE = (64, 36)
+    SCENE_CUT_THRESHOLD = 20.0  # Minimum mean absolute gray-level change for a cut
+    
+    # Audio-energy ranking (videos without heatmap or chapters)
+    AUDIO_SAMPLE_RATE = 11025
+    AUDIO_N_FFT = 2048  # Fine enough frequency bins for chroma
+    AUDIO_HOP_LENGTH = 512
+    AUDIO_SCAN_SECONDS = 1800  # Only the first 30 minutes of very long videos
+    AUDIO_PURITY_WEIGHT = 0.5
+    SPEECH_MID_SHARE = 0.6  # Share of band energy in 250-4000 Hz for a speech-like frame
+    
+    # Chorus detection (music videos): chroma self-similarity at CHORUS_FRAME_RATE frames
+    # per second, repeats at least CHORUS_MIN_LAG_SECONDS apart that stay similar for
+    # CHORUS_MATCH_SECONDS. A match needs a mean chroma correlation of at least
+    # CHORUS_MIN_SIMILARITY and must stand CHORUS_MIN_ZSCORE robust deviations above
+    # the rest of its lag
+    CHORUS_FRAME_RATE = 2
+    CHORUS_MIN_LAG_SECONDS = 10
+    CHORUS_MATCH_SECONDS = 8
+    CHORUS_MIN_SIMILARITY = 0.7
+    CHORUS_MIN_ZSCORE = 3.0
+    CHORUS_SCAN_SECONDS = 600
+    
+    # Caption scoring: words that suggest a highlight, how much a keyword counts
+    # against a second of continuous speech, and the bonus for starting/ending a
+    # window on a sentence boundary
+    HIGHLIGHT_KEYWORDS = (
+        'highlight', 'best', 'amazing', 'epic', 'wow', 'incredible',
+        'tutorial', 'how to', 'tip', 'trick', 'secret', 'reveal'
+    )
+    # Common title words that say nothing about the topic
+    CAPTION_STOPWORDS = frozenset((
+        'about', 'after', 'again', 'also', 'been', 'before', 'being', 'could',
+        'does', 'doing', "don't", 'even', 'ever', 'every', 'from', 'have', 'here',
+        'into', 'just', 'like', 'made', 'make', 'more', 'most', 'much', 'need', 'never',
+        'only', 'other', 'over', 'part', 'really', 'same', 'should', 'some', 'still',
+        'than', 'that', 'their', 'them', 'then', 'there', 'these', 'they', 'thing',
+        'things', 'this', 'those', 'through', 'time', 'very', 'video', 'want', 'were',
+        'what', 'when', 'where', 'which', 'while', 'will', 'with', 'would', 'your',
+        "you're", 'yours'
+    ))
+    CAPTION_KEYWORD_WEIGHT = 2.0
+    SENTENCE_BOUNDARY_BONUS = 3.0
+    SENTENCE_PAUSE_SECONDS = 0.8  # A gap this long between words ends a sentence
+    MAX_WORD_SECONDS = 1.5  # Speech coverage credited to a single word
+    
     def __init__(self):
         """Initialize the video analyzer."""
         self.gemini_available = bool(settings.GEMINI_API_KEY)
         if self.gemini_available:
             genai.configure(api_key=settings.GEMINI_API_KEY)
             self.model = genai.GenerativeModel('gemini-pro')
+        self._audio_cache = {}
     
-    def analyze_video(self, url):
+    def analyze_video(self, url, use_cache=True):
         """
         Analyze a YouTube video to find the best segment for a Short.
         
+        Results are stored per video and ANALYZER_VERSION and reused until they
+        are older than settings.VIDEO_ANALYSIS_TTL.
+        
         Args:
             url (str): YouTube video URL
+            use_cache (bool): Reuse a stored analysis if there is a fresh one
             
         Returns:
             dict: Analysis results with suggested start/end times
         """
+        video_id = YoutubeIE.get_temp_id(url)
+        if use_cache and video_id:
+            cached = self._load_analysis(video_id)
+            if cached:
+                return cached
+        
         try:
             # Get video metadata
             video_info = self._get_video_info(url)
@@ -38,16 +116,22 @@ class VideoAnalyzer:
             # Analyze engagement data
             best_segment = self._find_best_segment(video_info)
             
+            # Start and end on shot changes rather than mid-shot
+            best_segment = self._snap_to_scene_cuts(best_segment, video_info)
+            
             # Get AI recommendations
             ai_analysis = self._get_ai_recommendations(video_info, best_segment)
             
-            return {
+            result = {
                 'success': True,
                 'video_info': video_info,
                 'suggested_segment': best_segment,
+                'candidate_segments': best_segment.get('candidates', [best_segment]),
                 'ai_analysis': ai_analysis,
                 'auto_detected': True
             }
+            self._store_analysis(video_info.get('id') or video_id, url, result)
+            return result
             
         except Exception as e:
             handle_error(e, context="Video Analysis", show_traceback=True)
@@ -57,6 +141,88 @@ class VideoAnalyzer:
                 'auto_detected': False
             }
     
+    def get_stored_segment(self, video_id):
+        """
+        The suggested segment of a stored analysis, without analyzing anything.
+        
+        Args:
+            video_id (str): YouTube video ID
+            
+        Returns:
+            dict: Suggested segment with start_time/end_time, or None if the video
+                  has no fresh stored analysis
+        """
+        stored = self._load_analysis(video_id)
+        return stored['suggested_segment'] if stored else None
+    
+    def _load_analysis(self, video_id):
+        """
+        Load a stored analysis for this analyzer version, if it has not expired.
+        
+        Args:
+            video_id (str): YouTube video ID
+            
+        Returns:
+            dict: Analysis results in analyze_video's format, or None
+        """
+        # Imported here so the analyzer module can be loaded before Django's apps are ready
+        from shorts.models import VideoAnalysis
+        
+        try:
+            record = VideoAnalysis.objects.filter(
+                video_id=video_id, analyzer_version=self.ANALYZER_VERSION
+            ).first()
+        except DatabaseError as e:
+            print(f"⚠️  Stored analysis unavailable: {e}")
+            return None
+        if record is None or record.is_expired(settings.VIDEO_ANALYSIS_TTL):
+            return None
+        
+        print(f"♻️  Reusing stored analysis for {video_id} (analyzer v{record.analyzer_version})")
+        video_info = dict(record.video_info)
+        video_info['heatmap'] = record.get_heatmap()
+        return {
+            'success': True,
+            'video_info': video_info,
+            'suggested_segment': record.suggested_segment,
+            'candidate_segments': record.candidate_segments,
+            'ai_analysis': record.ai_analysis,
+            'auto_detected': True,
+            'cached': True
+        }
+    
+    def _store_analysis(self, video_id, url, result):
+        """
+        Store an analysis, replacing any earlier one for this video.
+        
+        Args:
+            video_id (str): YouTube video ID
+            url (str): YouTube video URL
+            result (dict): Successful analyze_video result
+        """
+        from shorts.models import VideoAnalysis
+        
+        if not video_id:
+            return
+        video_info = result['video_info']
+        try:
+            # Analyses from other analyzer versions are stale now
+            VideoAnalysis.objects.filter(video_id=video_id).exclude(
+                analyzer_version=self.ANALYZER_VERSION
+            ).delete()
+            record = VideoAnalysis.objects.filter(
+                video_id=video_id, analyzer_version=self.ANALYZER_VERSION
+            ).first() or VideoAnalysis(video_id=video_id, analyzer_version=self.ANALYZER_VERSION)
+            record.youtube_url = url
+            record.set_heatmap(video_info.get('heatmap'))
+            record.video_info = {k: v for k, v in video_info.items() if k not in self.TRANSIENT_INFO_KEYS}
+            record.suggested_segment = result['suggested_segment']
+            record.candidate_segments = result['candidate_segments']
+            record.ai_analysis = result['ai_analysis']
+            record.save()
+        except DatabaseError as e:
+            print(f"⚠️  Could not store analysis: {e}")
+    
     def _get_video_info(self, url):
         """
         Extract detailed video information from YouTube with bot detection bypass.
@@ -77,6 +243,7 @@ class VideoAnalyzer:
             'quiet': True,
             'no_warnings': True,
             'extract_flat': False,
+            'skip_download': True,
         }
         
         # Add cookies file if it exists
@@ -90,6 +257,7 @@ class VideoAnalyzer:
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=False)
+                captions = self._fetch_captions(ydl, info)
                 
                 return {
                     'id': info.get('id'),
@@ -104,7 +272,10 @@ class VideoAnalyzer:
                     'chapters': info.get('chapters', []),
                     'heatmap': info.get('heatmap', []),  # Most replayed data
                     'thumbnail': info.get('thumbnail'),
-                    'uploader': info.get('uploader', 'Unknown')
+                    'uploader': info.get('uploader', 'Unknown'),
+                    'preview_stream_url': self._select_preview_stream(info.get('formats') or []),
+                    'audio_stream_url': self._select_audio_stream(info.get('formats') or []),
+                    'captions': captions
                 }
         except Exception as e:
             raise Exception(f"Failed to fetch video information: {str(e)}")
@@ -121,57 +292,692 @@ class VideoAnalyzer:
         """
         duration = video_info['duration']
         
-        # Strategy 1: Use heatmap data (most replayed)
+        captions = video_info.get('captions')
+        
+        # Strategy 1: Use heatmap data (most replayed), cut on sentence boundaries
         if video_info.get('heatmap') and len(video_info['heatmap']) > 0:
-            return self._analyze_heatmap(video_info['heatmap'], duration)
+            return self._analyze_heatmap(video_info['heatmap'], duration, captions=captions)
+        
+        audio_url = video_info.get('audio_stream_url')
+        has_audio = bool(audio_url) and duration > self.MIN_SEGMENT_SECONDS
+        
+        # Strategy 2: The chorus of music videos
+        if has_audio and 'Music' in (video_info.get('categories') or []):
+            features = self._decode_audio(audio_url, duration)
+            segment = features and self._analyze_repetition(features)
+            if segment:
+                return segment
         
-        # Strategy 2: Use chapters (if available)
+        # Strategy 3: Use chapters (if available)
         if video_info.get('chapters') and len(video_info['chapters']) > 0:
             return self._analyze_chapters(video_info['chapters'], duration)
         
-        # Strategy 3: Smart default based on video length
+        # Strategy 4: What is said, from the captions
+        if captions:
+            segment = self._analyze_captions(captions, duration, self._caption_keywords(video_info))
+            if segment:
+                return segment
+        
+        # Strategy 5: Loud, busy stretches of the audio track
+        if has_audio:
+            features = self._decode_audio(audio_url, duration)
+            segment = features and self._analyze_audio_energy(features)
+            if segment:
+                return segment
+        
+        # Strategy 6: Smart default based on video length
         return self._get_smart_default(duration)
     
-    def _analyze_heatmap(self, heatmap, duration):
+    def _analyze_heatmap(self, heatmap, duration, top_k=None, captions=None):
         """
-        Analyze YouTube heatmap to find most replayed segment.
+        Analyze YouTube heatmap to find the most replayed segments.
+        
+        The heatmap is resampled to one replay intensity per second and ranked
+        with _rank_windows. With captions, windows that start and end on sentence
+        boundaries are preferred, scaled to the heatmap's own spread so replay
+        intensity still decides.
         
         Args:
             heatmap (list): Heatmap data from YouTube
             duration (int): Video duration in seconds
+            top_k (int): Number of segments to return (None = TOP_K_SEGMENTS)
+            captions (dict): Caption index from _parse_captions (optional)
             
         Returns:
-            dict: Best segment
+            dict: Best segment, with all top-k segments under 'candidates'
         """
-        # Find the peak in the heatmap
-        max_heat = 0
-        peak_time = 0
+        heat = self._heatmap_per_second(heatmap, duration)
+        start_bonus = end_bonus = None
+        if captions:
+            start_bonus, end_bonus = self._sentence_boundary_bonus(captions, len(heat))
+            scale = float(np.std(heat)) / self.SENTENCE_BOUNDARY_BONUS
+            start_bonus, end_bonus = start_bonus * scale, end_bonus * scale
         
-        for point in heatmap:
-            heat_value = point.get('value', 0)
-            if heat_value > max_heat:
-                max_heat = heat_value
-                peak_time = point.get('start_time', 0)
+        candidates = []
+        for start, end, score in self._rank_windows(heat, top_k, start_bonus, end_bonus):
+            window = heat[start:end]
+            peak_time = start + int(np.argmax(window))
+            candidates.append({
+                'start_time': start,
+                'end_time': end,
+                'method': 'heatmap',
+                'confidence': 'high' if not candidates else 'medium',
+                'score': round(score, 3),
+                'mean_intensity': round(float(window.mean()), 3),
+                'reason': f'Most replayed segment detected at {self._format_time(peak_time)}'
+            })
         
-        # Create 30-60 second segment around peak
-        segment_duration = min(60, duration)  # Max 60 seconds for Shorts
+        if not candidates:
+            return self._get_smart_default(duration)
         
-        # Center the segment on the peak
-        start_time = max(0, peak_time - segment_duration // 2)
-        end_time = min(duration, start_time + segment_duration)
+        best_segment = dict(candidates[0])
+        best_segment['candidates'] = candidates
+        return best_segment
+    
+    def _rank_windows(self, intensity, top_k=None, start_bonus=None, end_bonus=None, baseline=None):
+        """
+        Pick the best non-overlapping windows of a per-second intensity curve.
         
-        # Adjust if end goes beyond duration
-        if end_time >= duration:
-            end_time = duration
-            start_time = max(0, end_time - segment_duration)
+        Every window from MIN_SEGMENT_SECONDS to MAX_SEGMENT_SECONDS long, at every
+        start second, is scored at once from prefix sums. A window's score is its
+        intensity above a baseline (the curve's median by default), so extra seconds
+        only help if they are above the usual level, plus any bonus for where it
+        starts and ends. The best windows are then picked greedily, and only while
+        they score above zero: filler at or below the baseline is never returned.
         
-        return {
-            'start_time': int(start_time),
-            'end_time': int(end_time),
-            'method': 'heatmap',
-            'confidence': 'high',
-            'reason': f'Most replayed segment detected at {self._format_time(peak_time)}'
-        }
+        Args:
+            intensity (np.ndarray): One value per second
+            top_k (int): Number of windows to return (None = TOP_K_SEGMENTS)
+            start_bonus (np.ndarray): Extra score for starting at each second (optional)
+            end_bonus (np.ndarray): Extra score for ending at each second boundary,
+                                    len(intensity) + 1 values (optional)
+            baseline (float): Level a second must exceed to add to a window (None = median)
+            
+        Returns:
+            list: (start, end, score) tuples, best first (empty if nothing stands out)
+        """
+        top_k = top_k or self.TOP_K_SEGMENTS
+        seconds = len(intensity)
+        if seconds <= self.MIN_SEGMENT_SECONDS:
+            return []
+        
+        # Excess intensity per second, and its prefix sum
+        excess = intensity - (np.median(intensity) if baseline is None else baseline)
+        prefix = np.concatenate(([0.0], np.cumsum(excess)))
+        
+        # Score matrix: rows = window lengths, columns = start seconds
+        lengths = np.arange(self.MIN_SEGMENT_SECONDS, min(self.MAX_SEGMENT_SECONDS, seconds) + 1)
+        starts = np.arange(seconds)
+        ends = starts[np.newaxis, :] + lengths[:, np.newaxis]
+        valid = ends <= seconds
+        scores = np.where(valid, prefix[np.minimum(ends, seconds)] - prefix[starts], -np.inf)
+        if start_bonus is not None:
+            scores += start_bonus[np.newaxis, :seconds]
+        if end_bonus is not None:
+            scores += np.where(valid, end_bonus[np.minimum(ends, seconds)], 0)
+        
+        windows = []
+        for _ in range(top_k):
+            best = np.argmax(scores)
+            if scores.flat[best] <= 0:
+                break
+            length_index, start = np.unravel_index(best, scores.shape)
+            start = int(start)
+            end = start + int(lengths[length_index])
+            windows.append((start, end, float(scores.flat[best])))
+            
+            # Drop every window that overlaps the one just picked
+            scores[(starts[np.newaxis, :] < end) & (ends > start)] = -np.inf
+        
+        return windows
+    
+    def _heatmap_per_second(self, heatmap, duration):
+        """
+        Resample heatmap buckets to one intensity value per second.
+        
+        Args:
+            heatmap (list): Heatmap buckets with start_time, end_time and value
+            duration (int): Video duration in seconds
+            
+        Returns:
+            np.ndarray: float64 intensity for each second of the video
+        """
+        starts = np.array([point.get('start_time', 0) for point in heatmap], dtype=np.float64)
+        values = np.array([point.get('value', 0) for point in heatmap], dtype=np.float64)
+        order = np.argsort(starts)
+        starts, values = starts[order], values[order]
+        
+        seconds = int(np.ceil(duration or (heatmap[-1].get('end_time') or starts[-1] + 1)))
+        # The bucket covering each second's midpoint
+        bucket = np.searchsorted(starts, np.arange(seconds) + 0.5, side='right') - 1
+        return values[np.clip(bucket, 0, len(values) - 1)]
+    
+    def _select_preview_stream(self, formats):
+        """
+        Pick the smallest video stream (for cheap analysis decodes).
+        
+        Args:
+            formats (list): yt-dlp format dicts
+            
+        Returns:
+            str: Stream URL, or None if there is no usable video format
+        """
+        video_formats = [
+            f for f in formats
+            if f.get('url') and f.get('vcodec') not in (None, 'none') and f.get('height')
+            and f.get('protocol', 'https') in ('https', 'http')
+        ]
+        if not video_formats:
+            return None
+        return min(video_formats, key=lambda f: (f['height'], f.get('tbr') or 0))['url']
+    
+    def _select_audio_stream(self, formats):
+        """
+        Pick the lowest-bitrate audio-only stream (for audio analysis without video).
+        
+        Args:
+            formats (list): yt-dlp format dicts
+            
+        Returns:
+            str: Stream URL, or None if there is no audio-only format
+        """
+        audio_formats = [
+            f for f in formats
+            if f.get('url') and f.get('vcodec') == 'none' and f.get('acodec') not in (None, 'none')
+            and f.get('protocol', 'https') in ('https', 'http')
+        ]
+        if not audio_formats:
+            return None
+        return min(audio_formats, key=lambda f: f.get('abr') or f.get('tbr') or float('inf'))['url']
+    
+    def _decode_audio(self, source, duration):
+        """
+        Decode the audio stream into frame-level features (once per source).
+        
+        The audio-only stream is decoded at a low sample rate and streamed
+        through the feature extractor, so nothing is downloaded to disk and memory
+        stays flat. Every audio strategy shares the result.
+        
+        Args:
+            source (str): Audio stream URL or path
+            duration (int): Video duration in seconds
+            
+        Returns:
+            dict: Features from audio_features.extract_streaming_features (with
+                  chroma), or None if the audio could not be decoded
+        """
+        if source in self._audio_cache:
+            return self._audio_cache[source]
+        
+        features = None
+        if audio_features.ffmpeg_available():
+            print("🎧 Analyzing the audio stream...")
+            try:
+                features = audio_features.extract_streaming_features(
+                    source, self.AUDIO_SAMPLE_RATE, duration=min(duration, self.AUDIO_SCAN_SECONDS),
+                    n_fft=self.AUDIO_N_FFT, hop_length=self.AUDIO_HOP_LENGTH, chroma=True
+                )
+            except (RuntimeError, OSError) as e:
+                print(f"⚠️  Audio analysis skipped: {e}")
+        self._audio_cache[source] = features
+        return features
+    
+    def _analyze_audio_energy(self, features, top_k=None):
+        """
+        Rank segments by how loud and eventful the audio is.
+        
+        Each second gets a loudness, an onset density and a speech/music ratio;
+        loudness and onset density (as z-scores) drive the score, and seconds that
+        are clearly music or clearly speech get a small bonus over mixed ones. The
+        per-second score is ranked with _rank_windows.
+        
+        Args:
+            features (dict): Features from _decode_audio
+            top_k (int): Number of segments to return (None = TOP_K_SEGMENTS)
+            
+        Returns:
+            dict: Best segment with all top-k segments under 'candidates', or None
+        """
+        loudness, onset_density, speech_ratio = self._audio_per_second(features)
+        if len(loudness) <= self.MIN_SEGMENT_SECONDS:
+            return None
+        
+        def zscore(values):
+            return (values - values.mean()) / (values.std() + 1e-6)
+        
+        purity = np.abs(speech_ratio - 0.5) * 2  # 0 = mixed, 1 = all speech or all music
+        score = zscore(loudness) + zscore(onset_density) + self.AUDIO_PURITY_WEIGHT * purity
+        
+        candidates = []
+        for start, end, window_score in self._rank_windows(score, top_k):
+            speech = float(speech_ratio[start:end].mean())
+            kind = 'speech' if speech >= 0.5 else 'music'
+            candidates.append({
+                'start_time': start,
+                'end_time': end,
+                'method': 'audio_energy',
+                'confidence': 'medium' if not candidates else 'low',
+                'score': round(window_score, 3),
+                'loudness_db': round(float(loudness[start:end].mean()), 1),
+                'onset_density': round(float(onset_density[start:end].mean()), 2),
+                'speech_ratio': round(speech, 2),
+                'reason': f'High-energy {kind} at {self._format_time(start)} (audio analysis)'
+            })
+        
+        if not candidates:
+            return None
+        
+        best_segment = dict(candidates[0])
+        best_segment['candidates'] = candidates
+        return best_segment
+    
+    def _analyze_repetition(self, features, top_k=None):
+        """
+        Find the most repeated section of a song (usually the chorus).
+        
+        Chroma is averaged down to CHORUS_FRAME_RATE frames per second, centered
+        and normalized, and compared all-against-all. A repeat shows up as a run of
+        high similarity along a diagonal of that matrix, so every diagonal (lag) is
+        smoothed over CHORUS_MATCH_SECONDS at once with prefix sums, and the best
+        matches mark both occurrences. Each second scores how many lags it
+        repeats at, which is ranked with _rank_windows.
+        
+        Args:
+            features (dict): Features from _decode_audio (with chroma)
+            top_k (int): Number of segments to return (None = TOP_K_SEGMENTS)
+            
+        Returns:
+            dict: Best segment with all top-k segments under 'candidates', or None
+        """
+        chroma = features.get('chroma')
+        frames_per_second = self.AUDIO_SAMPLE_RATE / self.AUDIO_HOP_LENGTH
+        block = max(int(round(frames_per_second / self.CHORUS_FRAME_RATE)), 1)
+        count = min(len(chroma) // block, self.CHORUS_SCAN_SECONDS * self.CHORUS_FRAME_RATE)
+        min_lag = self.CHORUS_MIN_LAG_SECONDS * self.CHORUS_FRAME_RATE
+        match = self.CHORUS_MATCH_SECONDS * self.CHORUS_FRAME_RATE
+        if count < min_lag + match:
+            return None
+        
+        # Downsampled chroma; centered so similarity is a correlation (silence scores 0)
+        chroma = chroma[:count * block].reshape(count, block, 12).mean(axis=1)
+        chroma = chroma - chroma.mean(axis=1, keepdims=True)
+        chroma /= np.maximum(np.linalg.norm(chroma, axis=1, keepdims=True), 1e-10)
+        similarity = chroma @ chroma.T
+        
+        # Time-lag view: row = lag, column = earlier occurrence
+        lags = np.arange(min_lag, count - match + 1)
+        frames = np.arange(count)
+        later = frames[np.newaxis, :] + lags[:, np.newaxis]
+        lagged = np.where(later < count, similarity[frames[np.newaxis, :], np.minimum(later, count - 1)], 0)
+        
+        # Mean similarity over the next `match` frames along every diagonal
+        prefix = np.concatenate([np.zeros((len(lags), 1)), np.cumsum(lagged, axis=1)], axis=1)
+        smoothed = (prefix[:, match:] - prefix[:, :-match]) / match
+        valid = later[:, :smoothed.shape[1]] + match <= count
+        if not valid.any():
+            return None
+        
+        # A repeat must be clearly similar in absolute terms and stand out from its
+        # own diagonal, so a track where nothing repeats produces no hits at all. The
+        # diagonal's baseline is its median and MAD, which a long repeat cannot inflate
+        masked = np.where(valid, smoothed, np.nan)
+        lag_median = np.nanmedian(masked, axis=1, keepdims=True)
+        lag_spread = 1.4826 * np.nanmedian(np.abs(masked - lag_median), axis=1, keepdims=True)
+        zscore = (smoothed - lag_median) / np.maximum(lag_spread, 1e-3)
+        hits = valid & (smoothed >= self.CHORUS_MIN_SIMILARITY) & (zscore >= self.CHORUS_MIN_ZSCORE)
+        if not hits.any():
+            return None
+        
+        # Frames covered by a match at each lag, as the earlier and as the later occurrence
+        hit_prefix = np.concatenate([np.zeros((len(lags), 1)), np.cumsum(hits, axis=1)], axis=1)
+        hit_prefix = np.pad(hit_prefix, ((0, 0), (0, count + 1 - hit_prefix.shape[1])), mode='edge')
+        earlier = hit_prefix[:, 1:] - hit_prefix[:, np.maximum(frames - match + 1, 0)] > 0
+        source = frames[np.newaxis, :] - lags[:, np.newaxis]
+        repeated = earlier | ((source >= 0) & earlier[np.arange(len(lags))[:, np.newaxis], np.maximum(source, 0)])
+        repetition = repeated.sum(axis=0).astype(np.float64)
+        
+        seconds = count // self.CHORUS_FRAME_RATE
+        repetition = repetition[:seconds * self.CHORUS_FRAME_RATE].reshape(seconds, -1).mean(axis=1)
+        if not repetition.any():
+            return None
+        
+        # Most of a track may not repeat at all (median 0); seconds repeating less than
+        # the typical repeated second count against a window
+        baseline = float(repetition[repetition > 0].mean())
+        candidates = []
+        for start, end, window_score in self._rank_windows(repetition, top_k, baseline=baseline):
+            candidates.append({
+                'start_time': start,
+                'end_time': end,
+                'method': 'chorus',
+                'confidence': 'high' if not candidates else 'medium',
+                'score': round(window_score, 3),
+                'repetition': round(float(repetition[start:end].mean()), 2),
+                'reason': f'Most repeated section (likely the chorus) at {self._format_time(start)}'
+            })
+        
+        # Nothing repeats more than the rest of the track: no chorus to pick
+        if not candidates:
+            return None
+        
+        best_segment = dict(candidates[0])
+        best_segment['candidates'] = candidates
+        return best_segment
+    
+    def _audio_per_second(self, features):
+        """
+        Summarize frame-level audio features per second.
+        
+        Args:
+            features (dict): Features from _decode_audio
+            
+        Returns:
+            tuple: (loudness in dB, onsets per second, fraction of speech-like frames),
+                   each an array with one value per whole second
+        """
+        seconds = int(features['duration'])
+        second = features['times'].astype(np.int64)
+        keep = second < seconds
+        second = second[keep]
+        counts = np.maximum(np.bincount(second, minlength=seconds), 1)
+        
+        def per_second(values):
+            return np.bincount(second, weights=values[keep], minlength=seconds) / counts
+        
+        # Loudness: mean frame energy per second, in dB
+        loudness = 10 * np.log10(per_second(features['rms'].astype(np.float64) ** 2) + 1e-10)
+        
+        # Onsets: local maxima of the onset envelope that stand out from it
+        onset = features['onset']
+        threshold = onset.mean() + onset.std()
+        peaks = np.zeros(len(onset), dtype=np.float64)
+        if len(onset) > 2:
+            middle = onset[1:-1]
+            peaks[1:-1] = (middle > threshold) & (middle >= onset[:-2]) & (middle > onset[2:])
+        onset_density = per_second(peaks) * counts  # Peaks in each second
+        
+        # Speech-like frames: energy concentrated in the voice band, with a voice-range
+        # centroid; music spreads energy into bass and treble
+        bands = features['bass'] + features['mid'] + features['treble'] + 1e-10
+        voice = (features['mid'] / bands > self.SPEECH_MID_SHARE) & \
+            (features['centroid'] > 300) & (features['centroid'] < 3000)
+        speech_ratio = per_second(voice.astype(np.float64))
+        
+        return loudness, onset_density, speech_ratio
+    
+    def _fetch_captions(self, ydl, info):
+        """
+        Download the video's captions (a few kilobytes, no media) and index them.
+        
+        Uploaded subtitles are preferred over automatic captions, in the video's
+        own language when yt-dlp knows it, otherwise English.
+        
+        Args:
+            ydl (yt_dlp.YoutubeDL): Open downloader (reuses its cookies and headers)
+            info (dict): Extracted video info
+            
+        Returns:
+            dict: Caption index from _parse_captions, or None if there are no captions
+        """
+        language = (info.get('language') or 'en').split('-')[0]
+        for tracks in (info.get('subtitles'), info.get('automatic_captions')):
+            if not tracks:
+                continue
+            # Original-language track first ('en-orig' on auto captions), then any variant
+            names = sorted(
+                (name for name in tracks if name.split('-')[0] == language),
+                key=lambda name: (not name.endswith('-orig'), name != language, name)
+            )
+            for name in names:
+                track = next((t for t in tracks[name] if t.get('ext') == 'json3' and t.get('url')), None)
+                if not track:
+                    continue
+                try:
+                    data = json.loads(ydl.urlopen(track['url']).read())
+                except Exception as e:
+                    print(f"⚠️  Could not fetch captions: {e}")
+                    return None
+                captions = self._parse_captions(data)
+                if captions:
+                    print(f"💬 Indexed {len(captions['tokens'])} caption words ({name})")
+                    return captions
+        return None
+    
+    def _parse_captions(self, data):
+        """
+        Build a timestamped token index from YouTube json3 captions.
+        
+        Args:
+            data (dict): Parsed json3 caption file
+            
+        Returns:
+            dict: 'tokens' (lowercase words), 'starts' and 'ends' (seconds per word)
+                  and 'sentence_starts' (seconds), or None if there are no words
+        """
+        words = []
+        for event in data.get('events', []):
+            event_start = event.get('tStartMs', 0) / 1000
+            event_end = event_start + event.get('dDurationMs', 0) / 1000
+            segs = [seg for seg in event.get('segs') or [] if seg.get('utf8', '').split()]
+            seg_starts = [event_start + seg.get('tOffsetMs', 0) / 1000 for seg in segs]
+            
+            # Auto captions time every word; uploaded subtitles put a whole line in one
+            # seg, so spread its words evenly until the next seg (or the end of the line)
+            for seg, seg_start, seg_end in zip(segs, seg_starts, seg_starts[1:] + [event_end]):
+                seg_words = seg['utf8'].split()
+                step = max(seg_end - seg_start, 0) / len(seg_words)
+                for k, word in enumerate(seg_words):
+                    words.append((seg_start + k * step, word, event_end))
+        if not words:
+            return None
+        
+        words.sort(key=lambda w: w[0])
+        starts = [w[0] for w in words]
+        tokens = [w[1].lower().strip('.,!?;:"\'()[]') for w in words]
+        
+        # A word ends at the next word or the end of its caption line, whichever is first
+        ends = [min(nxt, event_end, start + self.MAX_WORD_SECONDS)
+                for start, nxt, event_end in zip(starts, starts[1:] + [float('inf')], [w[2] for w in words])]
+        ends = [max(end, start) for start, end in zip(starts, ends)]
+        
+        # Sentences start after terminal punctuation or a pause (auto captions have no punctuation)
+        sentence_starts = [starts[0]] + [
+            starts[i] for i in range(1, len(words))
+            if words[i - 1][1].rstrip('"\')').endswith(('.', '!', '?'))
+            or starts[i] - ends[i - 1] >= self.SENTENCE_PAUSE_SECONDS
+        ]
+        
+        return {'tokens': tokens, 'starts': starts, 'ends': ends, 'sentence_starts': sentence_starts}
+    
+    def _caption_keywords(self, video_info):
+        """
+        Keywords worth looking for in the captions: highlight words plus the video's
+        own title words and tags, without stopwords and numbers.
+        
+        Args:
+            video_info (dict): Video information
+            
+        Returns:
+            set: Lowercase keywords (single words)
+        """
+        keywords = {word for phrase in self.HIGHLIGHT_KEYWORDS for word in phrase.split() if len(word) > 3}
+        for text in [video_info.get('title') or ''] + list(video_info.get('tags') or []):
+            keywords.update(word.strip('.,!?;:"\'()[]#|-') for word in text.lower().split())
+        return {word for word in keywords
+                if len(word) > 3 and word not in self.CAPTION_STOPWORDS and not any(ch.isdigit() for ch in word)}
+    
+    def _analyze_captions(self, captions, duration, keywords, top_k=None):
+        """
+        Rank segments by what is said in them.
+        
+        Each second scores its speech coverage plus CAPTION_KEYWORD_WEIGHT per
+        keyword spoken in it, so dense, uninterrupted talk about the video's topic
+        wins over silence and filler. Windows that start on a sentence start and
+        end on a sentence end get SENTENCE_BOUNDARY_BONUS for each.
+        
+        Args:
+            captions (dict): Caption index from _parse_captions
+            duration (int): Video duration in seconds
+            keywords (set): Lowercase keywords
+            top_k (int): Number of segments to return (None = TOP_K_SEGMENTS)
+            
+        Returns:
+            dict: Best segment with all top-k segments under 'candidates', or None
+        """
+        seconds = int(np.ceil(duration or captions['ends'][-1]))
+        starts = np.asarray(captions['starts'], dtype=np.float64)
+        ends = np.asarray(captions['ends'], dtype=np.float64)
+        keep = starts < seconds
+        starts, ends = starts[keep], np.minimum(ends[keep], seconds)
+        if len(starts) == 0:
+            return None
+        
+        # Speech continuity: seconds of speech inside each second (difference array over words)
+        coverage = np.zeros(seconds + 1)
+        np.add.at(coverage, starts.astype(np.int64), 1)
+        np.add.at(coverage, np.ceil(ends).astype(np.int64), -1)
+        speech = (np.cumsum(coverage)[:seconds] > 0).astype(np.float64)
+        
+        # Keyword density: keywords spoken in each second
+        is_keyword = np.array([token in keywords for token in captions['tokens']])[keep]
+        keyword_count = np.bincount(starts[is_keyword].astype(np.int64), minlength=seconds)[:seconds]
+        
+        score = speech + self.CAPTION_KEYWORD_WEIGHT * keyword_count
+        start_bonus, end_bonus = self._sentence_boundary_bonus(captions, seconds)
+        
+        candidates = []
+        for start, end, window_score in self._rank_windows(score, top_k, start_bonus, end_bonus):
+            spoken = [token for token, t in zip(captions['tokens'], captions['starts'])
+                      if start <= t < end and token in keywords]
+            topics = ', '.join(dict.fromkeys(spoken)) or 'continuous speech'
+            candidates.append({
+                'start_time': start,
+                'end_time': end,
+                'method': 'captions',
+                'confidence': 'medium' if not candidates else 'low',
+                'score': round(window_score, 3),
+                'keyword_count': len(spoken),
+                'speech_ratio': round(float(speech[start:end].mean()), 2),
+                'reason': f'Captions at {self._format_time(start)}: {topics}'
+            })
+        
+        if not candidates:
+            return None
+        
+        best_segment = dict(candidates[0])
+        best_segment['candidates'] = candidates
+        return best_segment
+    
+    def _sentence_boundary_bonus(self, captions, seconds):
+        """
+        Window start/end bonuses for whole-second boundaries next to sentence boundaries.
+        
+        Args:
+            captions (dict): Caption index from _parse_captions
+            seconds (int): Length of the per-second curve
+            
+        Returns:
+            tuple: (start_bonus with seconds values, end_bonus with seconds + 1 values)
+        """
+        sentence_starts = np.asarray(captions['sentence_starts'], dtype=np.float64)
+        sentence_starts = sentence_starts[sentence_starts < seconds]
+        
+        # Start on the whole second just before a sentence starts, so its first word is kept
+        start_bonus = np.zeros(seconds)
+        start_bonus[np.floor(sentence_starts).astype(np.int64)] = self.SENTENCE_BOUNDARY_BONUS
+        
+        # End on the whole second just after the previous sentence's last word
+        starts = np.asarray(captions['starts'], dtype=np.float64)
+        ends = np.asarray(captions['ends'], dtype=np.float64)
+        last_words = np.searchsorted(starts, sentence_starts[1:]) - 1
+        sentence_ends = np.concatenate([ends[last_words], ends[-1:]])
+        end_bonus = np.zeros(seconds + 1)
+        end_bonus[np.minimum(np.ceil(sentence_ends), seconds).astype(np.int64)] = self.SENTENCE_BOUNDARY_BONUS
+        return start_bonus, end_bonus
+    
+    def _snap_to_scene_cuts(self, segment, video_info):
+        """
+        Move segment boundaries to the nearest scene cut.
+        
+        Only SNAP_RADIUS_SECONDS around each boundary are decoded, from the
+        smallest available stream, scaled down to a few dozen pixels and
+        subsampled to SNAP_FPS. A boundary without a cut nearby stays put, and
+        snapping never pushes the clip outside the allowed length.
+        
+        Args:
+            segment (dict): Segment with start_time/end_time
+            video_info (dict): Video information (uses preview_stream_url)
+            
+        Returns:
+            dict: Segment with snapped times (original values kept under 'unsnapped')
+        """
+        source = video_info.get('preview_stream_url')
+        if not source or not shutil.which('ffmpeg'):
+            return segment
+        
+        # Whole seconds, rounded into the shot: start just after a cut, end just before one
+        start = self._nearest_scene_cut(source, segment['start_time'])
+        end = self._nearest_scene_cut(source, segment['end_time'])
+        start = segment['start_time'] if start is None else int(np.ceil(start))
+        end = segment['end_time'] if end is None else int(np.floor(end))
+        
+        length = end - start
+        if not self.MIN_SEGMENT_SECONDS <= length <= self.MAX_SEGMENT_SECONDS:
+            return segment
+        if (start, end) == (segment['start_time'], segment['end_time']):
+            return segment
+        
+        print(f"✂️  Snapped segment to scene cuts: {self._format_time(start)} - {self._format_time(end)}")
+        snapped = dict(segment)
+        snapped['unsnapped'] = {'start_time': segment['start_time'], 'end_time': segment['end_time']}
+        snapped['start_time'] = start
+        snapped['end_time'] = end
+        return snapped
+    
+    def _nearest_scene_cut(self, source, boundary):
+        """
+        Find the scene cut closest to a boundary time.
+        
+        Args:
+            source (str): Video URL or path
+            boundary (float): Boundary time in seconds
+            
+        Returns:
+            float: Cut time in seconds (rounded to 0.1s), or None if no cut is nearby
+        """
+        window_start = max(boundary - self.SNAP_RADIUS_SECONDS, 0)
+        width, height = self.SNAP_FRAME_SIZE
+        cmd = [
+            'ffmpeg', '-nostdin', '-loglevel', 'error',
+            '-skip_frame', 'noref',  # Skip decoding frames nothing else references
+            '-ss', str(window_start),
+            '-t', str(boundary + self.SNAP_RADIUS_SECONDS - window_start),
+            '-i', source,
+            '-an',
+            '-vf', f"fps={self.SNAP_FPS},scale={width}:{height}:flags=area,format=gray",
+            '-f', 'rawvideo', '-'
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, timeout=20, check=True)
+        except (subprocess.SubprocessError, OSError) as e:
+            print(f"⚠️  Scene detection skipped: {e}")
+            return None
+        
+        frames = np.frombuffer(result.stdout, dtype=np.uint8)
+        frames = frames[:len(frames) // (width * height) * width * height].reshape(-1, height, width)
+        if len(frames) < 3:
+            return None
+        
+        # Mean absolute change between consecutive frames; a cut is a clear outlier
+        change = np.abs(np.diff(frames.astype(np.int16), axis=0)).mean(axis=(1, 2))
+        threshold = max(self.SCENE_CUT_THRESHOLD, 3 * float(np.median(change)))
+        cuts = np.flatnonzero(change > threshold) + 1  # Index of the first frame of each new shot
+        if len(cuts) == 0:
+            return None
+        
+        cut_times = window_start + cuts / self.SNAP_FPS
+        nearest = cut_times[np.argmin(np.abs(cut_times - boundary))]
+        return round(float(nearest), 1)
     
     def _analyze_chapters(self, chapters, duration):
         """
@@ -185,17 +991,12 @@ class VideoAnalyzer:
             dict: Best segment
         """
         # Find the most interesting chapter based on title keywords
-        interesting_keywords = [
-            'highlight', 'best', 'amazing', 'epic', 'wow', 'incredible',
-            'tutorial', 'how to', 'tip', 'trick', 'secret', 'reveal'
-        ]
-        
         best_chapter = None
         max_score = 0
         
         for chapter in chapters:
             title = chapter.get('title', '').lower()
-            score = sum(1 for keyword in interesting_keywords if keyword in title)
+            score = sum(1 for keyword in self.HIGHLIGHT_KEYWORDS if keyword in title)
             
             if score > max_score:
                 max_score = score
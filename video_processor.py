@@ -6,11 +6,36 @@ This module handles downloading YouTube videos and cropping them to create short
 import os
 import yt_dlp
 import subprocess
+import numpy as np
 from pathlib import Path
 from ai_error_handler import handle_error, get_error_message
 
 
 class VideoProcessor:
+    # Reframes a landscape source to vertical 1080x1920 (transpose=1 rotates 90° clockwise)
+    SHORTS_FILTER = 'transpose=1,scale=1080:1920:flags=lanczos'
+    
+    # Seamless-loop search: the end point may move up to LOOP_SEARCH_SECONDS earlier.
+    # The first LOOP_MATCH_SECONDS of the clip are compared against every candidate
+    # end as tiny thumbnails at LOOP_FPS plus an audio loudness envelope
+    LOOP_SEARCH_SECONDS = 3
+    LOOP_MATCH_SECONDS = 0.3
+    LOOP_FPS = 30
+    LOOP_FRAME_SIZE = (32, 18)
+    LOOP_AUDIO_RATE = 12000  # Multiple of LOOP_FPS: 400 samples per frame
+    LOOP_AUDIO_WEIGHT = 0.5
+    LOOP_DRIFT_WEIGHT = 0.01  # Cost per second of moving the end point
+    LOOP_MAX_MISMATCH = 0.05  # Worse matches than this are not worth cutting content for
+    
+    # Dead-air trimming: only the first/last TRIM_WINDOW_SECONDS of a clip are scanned
+    # for silence and black frames; a little padding is left before/after the content
+    TRIM_WINDOW_SECONDS = 2.5
+    TRIM_PAD_SECONDS = 0.1
+    TRIM_MIN_CLIP_SECONDS = 5
+    SILENCE_THRESHOLD = '-40dB'
+    SILENCE_MIN_SECONDS = 0.3
+    BLACK_MIN_SECONDS = 0.1
+    
     def __init__(self, download_dir='downloads', output_dir='outputs'):
         """Initialize the video processor with download and output directories."""
         self.download_dir = Path(download_dir)
@@ -119,7 +144,7 @@ class VideoProcessor:
             int: Time in seconds
         """
         if isinstance(time_str, (int, float)):
-            return int(time_str)
+            return time_str  # Adjusted (trimmed/looped) times keep their fraction
         
         parts = time_str.strip().split(':')
         
@@ -134,7 +159,8 @@ class VideoProcessor:
         else:
             raise ValueError("Invalid time format. Use 'MM:SS' or 'HH:MM:SS'")
     
-    def crop_video(self, video_path, start_time, end_time, output_filename='short.mp4', make_shorts_format=True):
+    def crop_video(self, video_path, start_time, end_time, output_filename='short.mp4', make_shorts_format=True,
+                   seamless_loop=False, trim_edges=True):
         """
         Crop a video from start_time to end_time and convert to YouTube Shorts format using FFmpeg.
         Fast single-pass processing with no temporary audio files.
@@ -145,6 +171,8 @@ class VideoProcessor:
             end_time (str or int): End time (format: "MM:SS" or seconds)
             output_filename (str): Name of the output file
             make_shorts_format (bool): Convert to vertical 9:16 format for YouTube Shorts
+            seamless_loop (bool): Pull the end point in so the last frame flows into the first
+            trim_edges (bool): Drop silence and black frames at the start and end
             
         Returns:
             str: Path to the cropped video
@@ -153,7 +181,11 @@ class VideoProcessor:
             # Parse times
             start_seconds = self.parse_time(start_time)
             end_seconds = self.parse_time(end_time)
-            duration = end_seconds - start_seconds
+            if trim_edges and end_seconds > start_seconds:
+                start_seconds, end_seconds = self.trim_dead_air(video_path, start_seconds, end_seconds)
+            if seamless_loop and end_seconds > start_seconds:
+                end_seconds = self.find_loop_point(video_path, start_seconds, end_seconds)
+            duration = round(end_seconds - start_seconds, 3)
             
             # Validate times
             if start_seconds < 0:
@@ -217,7 +249,7 @@ class VideoProcessor:
                     '-y',
                     '-i', str(temp_cut_path),
                     # transpose=1 rotates 90° clockwise, scale with high quality algorithm
-                    '-vf', 'transpose=1,scale=1080:1920:flags=lanczos',
+                    '-vf', self.SHORTS_FILTER,
                     '-c:v', 'libx264',
                     '-preset', 'veryfast',  # Much faster encoding for slower servers
                     '-crf', '23',  # Balanced quality (lower = better, but slower)
@@ -275,20 +307,211 @@ class VideoProcessor:
         except Exception as e:
             raise Exception(f"Error cropping video: {str(e)}")
     
+    def trim_dead_air(self, video_path, start_seconds, end_seconds):
+        """
+        Tighten a clip past leading/trailing silence and black frames.
+        
+        The first and last TRIM_WINDOW_SECONDS of the clip are decoded as two
+        inputs of one FFmpeg run, concatenated, and streamed through silencedetect
+        and blackdetect together (video scaled to a thumbnail first), so the whole
+        check is a single short analysis pass. Only dead air touching the clip's
+        edges is trimmed; whichever of silence or black runs longer wins. Clips
+        without an audio track are checked for black frames only, and a clip short
+        enough to be probed whole that is dead air from end to end is left alone.
+        
+        Args:
+            video_path (str): Path to the video file
+            start_seconds (float): Clip start in seconds
+            end_seconds (float): Clip end in seconds
+            
+        Returns:
+            tuple: (start, end) in seconds, unchanged if nothing needs trimming
+        """
+        window = min(self.TRIM_WINDOW_SECONDS, (end_seconds - start_seconds) / 2)
+        if window <= 0:
+            return start_seconds, end_seconds
+        
+        inputs = [
+            'ffmpeg', '-nostdin', '-hide_banner', '-nostats',
+            '-ss', f"{start_seconds:.3f}", '-t', f"{window:.3f}", '-i', str(video_path),
+            '-ss', f"{end_seconds - window:.3f}", '-t', f"{window:.3f}", '-i', str(video_path),
+        ]
+        scale = '[0:v]scale=64:36,setsar=1[head];[1:v]scale=64:36,setsar=1[tail];'
+        black = f'blackdetect=d={self.BLACK_MIN_SECONDS}:pix_th=0.10[vout]'
+        av_cmd = inputs + [
+            '-filter_complex',
+            scale + '[head][0:a][tail][1:a]concat=n=2:v=1:a=1[v][a];'
+            f'[v]{black};[a]silencedetect=n={self.SILENCE_THRESHOLD}:d={self.SILENCE_MIN_SECONDS}[aout]',
+            '-map', '[vout]', '-map', '[aout]', '-f', 'null', '-'
+        ]
+        video_cmd = inputs + [
+            '-filter_complex', scale + f'[head][tail]concat=n=2:v=1:a=0[v];[v]{black}',
+            '-map', '[vout]', '-f', 'null', '-'
+        ]
+        try:
+            try:
+                result = subprocess.run(av_cmd, capture_output=True, text=True, timeout=30, check=True)
+            except subprocess.CalledProcessError as e:
+                if 'matches no streams' not in (e.stderr or ''):
+                    raise
+                # No audio track: black frames are the only dead air to look for
+                result = subprocess.run(video_cmd, capture_output=True, text=True, timeout=30, check=True)
+        except (subprocess.SubprocessError, OSError) as e:
+            print(f"⚠️  Dead-air trimming skipped: {e}")
+            return start_seconds, end_seconds
+        
+        # Dead-air intervals on the concatenated timeline: head is [0, window), tail [window, 2 * window)
+        total = 2 * window
+        intervals = []
+        silence_start = None
+        for line in result.stderr.splitlines():
+            if 'black_start:' in line:
+                fields = dict(part.split(':', 1) for part in line.split() if part.startswith('black_'))
+                intervals.append((float(fields['black_start']), float(fields['black_end'])))
+            elif 'silence_start:' in line:
+                silence_start = float(line.split('silence_start:')[1].split()[0])
+            elif 'silence_end:' in line and silence_start is not None:
+                intervals.append((silence_start, float(line.split('silence_end:')[1].split()[0].rstrip('|'))))
+                silence_start = None
+        if silence_start is not None:  # Silence running to the end of the stream
+            intervals.append((silence_start, total))
+        
+        tolerance = 1.0 / 30  # About one frame
+        if end_seconds - start_seconds <= total and any(
+                begin <= tolerance and end >= total - tolerance for begin, end in intervals):
+            # The probe covered the whole clip and it is dead throughout: nothing to tighten
+            return start_seconds, end_seconds
+        # Otherwise an interval spanning the head/tail join is split there, each edge trimmed on its own
+        head_trim = max([min(end, window) for begin, end in intervals if begin <= tolerance] + [0])
+        tail_trim = max([total - max(begin, window) for begin, end in intervals if end >= total - tolerance] + [0])
+        
+        new_start = start_seconds + max(head_trim - self.TRIM_PAD_SECONDS, 0)
+        new_end = end_seconds - max(tail_trim - self.TRIM_PAD_SECONDS, 0)
+        if new_end - new_start < self.TRIM_MIN_CLIP_SECONDS:
+            return start_seconds, end_seconds
+        if (new_start, new_end) != (start_seconds, end_seconds):
+            print(f"✂️  Trimmed dead air: {new_start - start_seconds:.2f}s at start, {end_seconds - new_end:.2f}s at end")
+        return round(new_start, 3), round(new_end, 3)
+    
+    def find_loop_point(self, video_path, start_seconds, end_seconds):
+        """
+        Find the end point (at most LOOP_SEARCH_SECONDS before end_seconds) where
+        the clip loops back into its start most seamlessly.
+        
+        Cutting at a candidate end means the frame after the last one shown is the
+        first frame of the clip again, so the video just past each candidate is
+        compared with the first LOOP_MATCH_SECONDS of the clip: thumbnails by mean
+        absolute pixel difference, audio by its loudness envelope. Only those two
+        short windows are decoded, as 32x18 thumbnails and low-rate mono audio.
+        
+        Args:
+            video_path (str): Path to the video file
+            start_seconds (float): Clip start in seconds
+            end_seconds (float): Requested clip end in seconds
+            
+        Returns:
+            float: Adjusted end time in seconds (end_seconds if no candidate matches
+                   the start within LOOP_MAX_MISMATCH)
+        """
+        match_frames = max(int(round(self.LOOP_MATCH_SECONDS * self.LOOP_FPS)), 1)
+        search_start = max(end_seconds - self.LOOP_SEARCH_SECONDS, start_seconds + 1)
+        if search_start >= end_seconds:
+            return end_seconds
+        
+        try:
+            head_frames, head_audio = self._loop_signature(video_path, start_seconds, self.LOOP_MATCH_SECONDS)
+            tail_frames, tail_audio = self._loop_signature(
+                video_path, search_start, end_seconds - search_start + self.LOOP_MATCH_SECONDS
+            )
+        except (subprocess.SubprocessError, OSError) as e:
+            print(f"⚠️  Loop search skipped: {e}")
+            return end_seconds
+        
+        match_frames = min(match_frames, len(head_frames))
+        candidates = min(len(tail_frames) - match_frames + 1, int(round((end_seconds - search_start) * self.LOOP_FPS)) + 1)
+        if match_frames == 0 or candidates <= 0:
+            return end_seconds
+        
+        # Video: how different the frames after each candidate end are from the clip's first frames
+        cost = np.zeros(candidates)
+        for j in range(match_frames):
+            cost += np.abs(tail_frames[j:j + candidates] - head_frames[j]).mean(axis=(1, 2, 3)) / 255
+        cost /= match_frames
+        
+        # Audio: same comparison on the loudness envelope (dB, one value per frame)
+        audio_frames = min(match_frames, len(head_audio), len(tail_audio) - candidates + 1)
+        if audio_frames > 0:
+            audio_cost = np.zeros(candidates)
+            for j in range(audio_frames):
+                audio_cost += np.abs(tail_audio[j:j + candidates] - head_audio[j]) / 60
+            cost += self.LOOP_AUDIO_WEIGHT * np.minimum(audio_cost / audio_frames, 1)
+        
+        # Prefer staying close to the requested end
+        times = search_start + np.arange(candidates) / self.LOOP_FPS
+        mismatch = cost.copy()
+        cost += self.LOOP_DRIFT_WEIGHT * (end_seconds - times)
+        
+        best = int(np.argmin(cost))
+        if mismatch[best] > self.LOOP_MAX_MISMATCH:
+            print(f"🔁 No clean loop point (best mismatch {mismatch[best]:.3f}), keeping end {end_seconds}s")
+            return end_seconds
+        loop_end = round(float(times[best]), 3)
+        print(f"🔁 Loop point: end {end_seconds}s → {loop_end}s (mismatch {mismatch[best]:.3f})")
+        return loop_end
+    
+    def _loop_signature(self, video_path, start, length):
+        """
+        Decode a short window as tiny RGB thumbnails and a per-frame loudness envelope.
+        
+        Args:
+            video_path (str): Path to the video file
+            start (float): Window start in seconds
+            length (float): Window length in seconds
+            
+        Returns:
+            tuple: (float32 frames of shape (n, h, w, 3), float64 loudness in dB per frame)
+        """
+        width, height = self.LOOP_FRAME_SIZE
+        window = ['ffmpeg', '-nostdin', '-loglevel', 'error', '-ss', f"{start:.3f}", '-t', f"{length:.3f}",
+                  '-i', str(video_path)]
+        video = subprocess.run(
+            window + ['-an', '-vf', f"fps={self.LOOP_FPS},scale={width}:{height}:flags=area,format=rgb24",
+                      '-f', 'rawvideo', '-'],
+            capture_output=True, check=True, timeout=30
+        ).stdout
+        frames = np.frombuffer(video, dtype=np.uint8)
+        frames = frames[:len(frames) // (width * height * 3) * width * height * 3]
+        frames = frames.reshape(-1, height, width, 3).astype(np.float32)
+        
+        # A missing audio stream just yields no envelope
+        audio = subprocess.run(
+            window + ['-vn', '-ac', '1', '-ar', str(self.LOOP_AUDIO_RATE), '-f', 'f32le', '-'],
+            capture_output=True, timeout=30
+        ).stdout
+        samples_per_frame = self.LOOP_AUDIO_RATE // self.LOOP_FPS
+        samples = np.frombuffer(audio, dtype=np.float32)
+        samples = samples[:len(samples) // samples_per_frame * samples_per_frame].reshape(-1, samples_per_frame)
+        loudness = 10 * np.log10(np.mean(samples.astype(np.float64) ** 2, axis=1) + 1e-10)
+        return frames, loudness
+    
     def _format_timestamp(self, seconds):
         """
-        Convert seconds to FFmpeg timestamp format (HH:MM:SS).
+        Convert seconds to FFmpeg timestamp format (HH:MM:SS, plus .mmm if fractional).
         
         Args:
-            seconds (int): Time in seconds
+            seconds (int or float): Time in seconds
             
         Returns:
             str: Formatted timestamp
         """
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+        millis = int(round(seconds * 1000))
+        hours = millis // 3600000
+        minutes = (millis % 3600000) // 60000
+        secs = (millis % 60000) // 1000
+        timestamp = f"{hours:02d}:{minutes:02d}:{secs:02d}"
+        if millis % 1000:  # Trimmed/looped times are fractional
+            timestamp += f".{millis % 1000:03d}"
+        return timestamp
     
     def _convert_to_shorts_format(self, clip, rotation_mode='smart'):
         """
@@ -373,7 +596,8 @@ class VideoProcessor:
         
         return final_clip
     
-    def process_youtube_video(self, url, start_time, end_time, output_filename='short.mp4', make_shorts_format=True):
+    def process_youtube_video(self, url, start_time, end_time, output_filename='short.mp4', make_shorts_format=True,
+                              seamless_loop=False):
         """
         Complete workflow: Download YouTube video and crop it for YouTube Shorts.
         
@@ -383,6 +607,7 @@ class VideoProcessor:
             end_time (str or int): End time for cropping
             output_filename (str): Name of the output file
             make_shorts_format (bool): Convert to vertical 9:16 format for YouTube Shorts
+            seamless_loop (bool): Adjust the end point so the short loops cleanly
             
         Returns:
             dict: Information about the processed video
@@ -396,7 +621,9 @@ class VideoProcessor:
         if make_shorts_format:
             print("Converting to YouTube Shorts format (9:16 vertical)...")
         
-        output_path = self.crop_video(video_path, start_time, end_time, output_filename, make_shorts_format)
+        output_path = self.crop_video(
+            video_path, start_time, end_time, output_filename, make_shorts_format, seamless_loop=seamless_loop
+        )
         
         print(f"Short created successfully: {output_path}")
         
@@ -162,6 +162,16 @@ GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')  # Set this in environment
 DOWNLOADS_DIR = BASE_DIR / 'downloads'
 OUTPUTS_DIR = BASE_DIR / 'outputs'
 
+# Persistent caches (audio analysis, etc.) - safe to delete at any time
+CACHE_DIR = BASE_DIR / 'cache'
+
+# TrueType font for animated title/hashtag overlays (None = DejaVu Sans Bold or Pillow's default)
+ANIMATION_FONT_PATH = os.environ.get('ANIMATION_FONT_PATH')
+
+# How long a stored video analysis is reused before the video is analyzed again (seconds)
+VIDEO_ANALYSIS_TTL = int(os.environ.get('VIDEO_ANALYSIS_TTL', 7 * 24 * 3600))
+
 # Create directories if they don't exist
 DOWNLOADS_DIR.mkdir(exist_ok=True)
 OUTPUTS_DIR.mkdir(exist_ok=True)
+CACHE_DIR.mkdir(exist_ok=True)